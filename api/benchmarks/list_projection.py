@@ -0,0 +1,71 @@
+"""Measures bytes of an article list page with and without the article list projection.
+
+Run with `python -m api.benchmarks.list_projection [--articles N] [--body-size BYTES]`. A page of synthetic
+articles is encoded as the query rows Couchbase returns, once selecting whole documents and once selecting
+only the article list fields, and as the response body sent to clients by each list schema.
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import List
+
+from ..models.article import ArticleModel
+from ..models.user import AuthorModel
+from ..queries import ARTICLE_LIST_FIELDS
+from ..schemas.article import MultipleArticlesResponseSchema
+
+
+def make_documents(articles: int, body_size: int) -> List[dict]:
+    author = AuthorModel(username="author", bio="Writes benchmarks")
+    return [
+        ArticleModel(
+            title=f"Article {i} about benchmarks",
+            description="A short description rendered by article lists",
+            body="lorem ipsum " * (body_size // 12),
+            tagList=["benchmarks", "python", "couchbase"],
+            createdAt=datetime(2024, 1, 1, 0, 0, i % 60),
+            authorId="author-id",
+            author=author,
+            favoritedUserIDs=tuple(f"user-{j}" for j in range(10)),
+            commentIDs=tuple(f"comment-{j}" for j in range(10)),
+        ).model_dump(mode="json")
+        for i in range(articles)
+    ]
+
+
+def row_bytes(rows: List[dict]) -> int:
+    return len(json.dumps(rows).encode())
+
+
+def response_bytes(rows: List[dict], include_body: bool) -> int:
+    response = MultipleArticlesResponseSchema.from_article_instances(
+        [ArticleModel(**row) for row in rows], len(rows), include_body=include_body
+    )
+    return len(response.model_dump_json().encode())
+
+
+def report(name: str, full: int, lean: int) -> None:
+    print(
+        f"{name:<10} with body {full:10d}B  projected {lean:10d}B  "
+        f"saved {100 * (full - lean) / full:5.1f}%"
+    )
+
+
+def main(articles: int, body_size: int) -> None:
+    documents = make_documents(articles, body_size)
+    projected = [{f: d[f] for f in ARTICLE_LIST_FIELDS} for d in documents]
+    report("couchbase", row_bytes(documents), row_bytes(projected))
+    report(
+        "client",
+        response_bytes(documents, include_body=True),
+        response_bytes(projected, include_body=False),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--body-size", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.articles, args.body_size)
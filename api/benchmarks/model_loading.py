@@ -0,0 +1,73 @@
+"""Measures construction of models from db rows with validation vs. the trusted from_db loaders.
+
+Run with `python -m api.benchmarks.model_loading [--rows N] [--repeat N]`. Rows are documents as written by the
+API, loaded through the validating constructors client input goes through and through `from_db` as read paths do.
+The best of the repeated runs is reported.
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from pydantic import BaseModel
+
+from ..models.article import ArticleModel, CommentModel
+from ..models.user import AuthorModel, UserModel
+
+
+def make_rows(rows: int):
+    author = AuthorModel(username="author", bio="Writes benchmarks")
+    user = UserModel(
+        username="author",
+        email="author@example.com",
+        hashed_password="x",
+        followingIds=tuple(f"user-{j}" for j in range(20)),
+    ).model_dump(mode="json")
+    article = ArticleModel(
+        title="An article about benchmarks",
+        description="A short description rendered by article lists",
+        body="lorem ipsum " * 100,
+        tagList=["benchmarks", "python", "couchbase"],
+        createdAt=datetime(2024, 1, 1, 0, 0, 0, 123456),
+        authorId="author-id",
+        author=author,
+        favoritedUserIDs=tuple(f"user-{j}" for j in range(10)),
+        commentIDs=tuple(f"comment-{j}" for j in range(10)),
+    ).model_dump(mode="json")
+    comment = CommentModel(
+        body="Thank you so much!", authorId="author-id", author=author
+    ).model_dump(mode="json")
+    return {
+        ArticleModel: [article] * rows,
+        UserModel: [user] * rows,
+        CommentModel: [comment] * rows,
+    }
+
+
+def measure(load: Callable[[dict], BaseModel], rows: List[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            load(row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(rows: int, repeat: int) -> None:
+    for model, model_rows in make_rows(rows).items():
+        validated = measure(lambda row: model(**row), model_rows, repeat)
+        trusted = measure(model.from_db, model_rows, repeat)
+        print(
+            f"{model.__name__:<13} validated {validated * 1000:8.1f}ms  "
+            f"from_db {trusted * 1000:8.1f}ms  per {rows} rows"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
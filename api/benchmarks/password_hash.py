@@ -0,0 +1,67 @@
+"""Measures event loop latency of concurrent non-auth work during a login storm.
+
+Run with `python -m api.benchmarks.password_hash [--logins N]`. A ticker coroutine stands in for
+non-auth requests and records how late the event loop wakes it up, first while bcrypt runs inline
+on the event loop and then while it runs on the bounded password hashing pool.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from ..utils.security import PASSWORD_HASHER, pwd_context
+
+TICK_SECONDS = 0.005
+
+
+async def inline_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+async def pooled_hash(password: str) -> str:
+    return await PASSWORD_HASHER.run(pwd_context.hash, password)
+
+
+async def ticker(lags: List[float], done: asyncio.Event) -> None:
+    """Sleeps for TICK_SECONDS in a loop and records how much later than due it woke up."""
+    while not done.is_set():
+        due = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - due)
+
+
+async def login_storm(hash_password: Callable[[str], Awaitable[str]], logins: int):
+    lags: List[float] = []
+    done = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, done))
+    start = time.perf_counter()
+    await asyncio.gather(*(hash_password(f"password-{i}") for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick_task
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: List[float]) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{name:<8} storm {elapsed:6.2f}s  ticks {len(lags_ms):5d}  "
+        f"lag p50 {statistics.median(lags_ms):8.2f}ms  "
+        f"p99 {p99:8.2f}ms  max {lags_ms[-1]:8.2f}ms"
+    )
+
+
+async def main(logins: int) -> None:
+    for name, hash_password in (("inline", inline_hash), ("pooled", pooled_hash)):
+        elapsed, lags = await login_storm(hash_password, logins)
+        report(name, elapsed, lags)
+    PASSWORD_HASHER.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,89 @@
+"""Measures serialization of an article list page by FastAPI vs. the orjson schema response.
+
+Run with `python -m api.benchmarks.serialization [--articles N] [--rounds N]`. The FastAPI path validates the
+returned schema against the response model, encodes it with jsonable_encoder and renders it with the standard
+library, as for handlers returning schemas. The fast path renders the schema with SchemaORJSONResponse, as the
+article list endpoints do.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from ..models.article import ArticleModel
+from ..models.user import AuthorModel, UserModel
+from ..schemas.article import MultipleArticlesResponseSchema
+from ..utils.responses import SchemaORJSONResponse
+
+
+def make_page(articles: int) -> MultipleArticlesResponseSchema:
+    authors: Dict[str, AuthorModel] = {
+        f"author-{i}": AuthorModel(username=f"author-{i}", bio="Writes benchmarks")
+        for i in range(5)
+    }
+    user = UserModel(
+        username="reader",
+        email="reader@example.com",
+        hashed_password="x",
+        followingIds=("author-0", "author-1"),
+    )
+    article_list = [
+        ArticleModel(
+            title=f"Article {i} about benchmarks",
+            description="A short description rendered by article lists",
+            tagList=["benchmarks", "python", "couchbase"],
+            createdAt=datetime(2024, 1, 1, 0, 0, i % 60, 123456),
+            authorId=f"author-{i % 5}",
+            favoritedUserIDs=tuple(f"user-{j}" for j in range(10)),
+        )
+        for i in range(articles)
+    ]
+    return MultipleArticlesResponseSchema.from_article_instances(
+        article_list, articles, user, authors=authors
+    )
+
+
+def fastapi_render(page: MultipleArticlesResponseSchema) -> bytes:
+    validated = MultipleArticlesResponseSchema.model_validate(page.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def orjson_render(page: MultipleArticlesResponseSchema) -> bytes:
+    return SchemaORJSONResponse(page).body
+
+
+def measure(
+    render: Callable[[MultipleArticlesResponseSchema], bytes],
+    page: MultipleArticlesResponseSchema,
+    rounds: int,
+) -> List[float]:
+    timings: List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        render(page)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)
+
+
+def main(articles: int, rounds: int) -> None:
+    page = make_page(articles)
+    assert json.loads(fastapi_render(page)) == json.loads(orjson_render(page))
+    for name, render in (("fastapi", fastapi_render), ("orjson", orjson_render)):
+        timings = measure(render, page, rounds)
+        print(
+            f"{name:<8} p50 {timings[len(timings) // 2] * 1e6:9.1f}us  "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1e6:9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.articles, args.rounds)
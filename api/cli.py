@@ -0,0 +1,114 @@
+"""Maintenance commands for the Conduit API, run with `python -m api.cli <command>`."""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from .core.article import backfill_favorite_counts, migrate_embedded_authors
+from .core.comment import backfill_comment_articles
+from .core.tag import rebuild_tag_counts
+from .core.user import backfill_user_lookups
+from .database import get_db
+from .indexes import audit_queries, create_indexes, explain_queries
+
+
+async def create_required_indexes(args: argparse.Namespace) -> None:
+    """Creates the secondary indexes the queries rely on, skipping existing ones."""
+    await create_indexes(get_db())
+    logging.info("Created and built required indexes")
+
+
+async def audit_indexes(args: argparse.Namespace) -> int:
+    """Checks every registered query against the declared indexes, failing if one has no sargable index."""
+    unindexed = audit_queries()
+    for name in unindexed:
+        logging.error(f"Query '{name}' has no sargable index")
+    return 1 if unindexed else 0
+
+
+async def explain_indexes(args: argparse.Namespace) -> int:
+    """Explains every registered query on the cluster, failing if a plan uses a primary scan."""
+    primary_scans = await explain_queries(get_db())
+    for name, operators in primary_scans.items():
+        logging.error(f"Query '{name}' uses a primary scan: {', '.join(operators)}")
+    return 1 if primary_scans else 0
+
+
+async def rebuild_tags(args: argparse.Namespace) -> None:
+    """Recounts tags over all articles and replaces the tag counts document."""
+    counts = await rebuild_tag_counts(get_db())
+    logging.info(f"Rebuilt tag counts for {len(counts)} tags")
+
+
+async def backfill_favorites(args: argparse.Namespace) -> None:
+    """Sets favoritesCount of every article from its favoritedUserIDs."""
+    await backfill_favorite_counts(get_db())
+    logging.info("Backfilled article favorite counts")
+
+
+async def backfill_lookups(args: argparse.Namespace) -> None:
+    """Inserts missing username and email lookup documents for every user."""
+    inserted = await backfill_user_lookups(get_db())
+    logging.info(f"Inserted {inserted} user lookup documents")
+
+
+async def migrate_authors(args: argparse.Namespace) -> None:
+    """Rewrites articles and comments embedding their whole author user to an author ID and profile snapshot."""
+    articles, comments = await migrate_embedded_authors(get_db())
+    logging.info(f"Migrated authors of {articles} articles and {comments} comments")
+
+
+async def backfill_comments(args: argparse.Namespace) -> None:
+    """Sets the articleSlug of comments written before comments referenced their article."""
+    updated = await backfill_comment_articles(get_db())
+    logging.info(f"Set the article of {updated} comments")
+
+
+COMMANDS = {
+    "create-indexes": create_required_indexes,
+    "audit-indexes": audit_indexes,
+    "explain-indexes": explain_indexes,
+    "rebuild-tags": rebuild_tags,
+    "backfill-favorites": backfill_favorites,
+    "backfill-user-lookups": backfill_lookups,
+    "migrate-authors": migrate_authors,
+    "backfill-comment-articles": backfill_comments,
+}
+
+# Commands that run without a database connection
+OFFLINE_COMMANDS = {"audit-indexes"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m api.cli", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparsers.add_parser(name, help=command.__doc__)
+    return parser
+
+
+async def run(args: argparse.Namespace) -> int:
+    if args.command in OFFLINE_COMMANDS:
+        return await COMMANDS[args.command](args) or 0
+    db = get_db()
+    await db.connect()
+    try:
+        return await COMMANDS[args.command](args) or 0
+    finally:
+        await db.close()
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stdout,
+        format="%(asctime)s %(levelname)s %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = build_parser().parse_args(argv)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
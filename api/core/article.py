@@ -1,25 +1,217 @@
+from typing import Any, Awaitable, Callable, Hashable, Sequence, Tuple, Union
+
+import couchbase.subdocument as SD
+from couchbase.exceptions import (
+    CasMismatchException,
+    DocumentNotFoundException,
+    PathExistsException,
+)
+from couchbase.options import MutateInOptions
 from fastapi import HTTPException
 
 from ..core.exceptions import ArticleNotFoundException
 from ..models.article import ArticleModel
+from ..queries import (
+    ARTICLE_BACKFILL_FAVORITE_COUNTS,
+    ARTICLE_BY_SLUG,
+    ARTICLE_LIST_FIELDS,
+    ARTICLE_MIGRATE_AUTHORS,
+    COMMENT_MIGRATE_AUTHORS,
+    NamedQuery,
+)
+from ..settings import SETTINGS
+from ..utils.cache import TTLCache
+from ..utils.invalidation import invalidate_cache
+from ..utils.singleflight import SingleFlight
 
+ARTICLE_COLLECTION = "article"
+COMMENT_COLLECTION = "comment"
 
-async def query_articles_by_slug(slug: str, db) -> ArticleModel:
-    """Queries db for article instance by slug and returns article instance."""
-    query = """
-            SELECT article.*
-            FROM article
-            WHERE article.slug=$slug
-            ORDER BY article.createdAt;
-        """
+# Attempts of optimistic read-modify-write sub-document operations before giving up
+MAX_CAS_RETRIES = 5
+
+# Types sub-document reads of the non-string article list fields are decoded as
+ARTICLE_LIST_FIELD_TYPES = {
+    "tagList": list,
+    "author": dict,
+    "favoritedUserIDs": list,
+}
+
+# Article documents as (key, content, CAS), keyed by slug
+ARTICLE_CACHE = TTLCache(
+    SETTINGS.ARTICLE_CACHE_MAX_SIZE, SETTINGS.ARTICLE_CACHE_TTL_SECONDS, name="article"
+)
+
+# Article document reads missing the article cache, keyed by slug
+ARTICLE_FLIGHTS = SingleFlight("article")
+
+# Total article counts, keyed by list filter
+ARTICLE_COUNT_CACHE = TTLCache(
+    SETTINGS.ARTICLE_COUNT_CACHE_MAX_SIZE,
+    SETTINGS.ARTICLE_COUNT_CACHE_TTL_SECONDS,
+    name="article_count",
+)
+
+
+async def get_article_document(slug: str, db) -> Tuple[str, dict]:
+    """Gets article document by slug from the article cache or the db and returns its key and content.
+
+    Articles are keyed by slug, so this is a KV get. Legacy documents stored under a different key are resolved with
+    a query fallback. Concurrent reads of a slug missing the cache share one read. The content must not be mutated, \
+    it is shared with the article cache and the concurrent readers."""
+    entry = ARTICLE_CACHE.get(slug)
+    if entry is None:
+        entry = await ARTICLE_FLIGHTS.do(slug, lambda: fetch_article_document(slug, db))
+    key, content, _ = entry
+    return key, content
+
+
+async def fetch_article_document(slug: str, db) -> Tuple[str, dict, Any]:
+    """Gets article document by slug from the db, stores it in the article cache and returns its key, content and \
+        CAS."""
+    generation = ARTICLE_CACHE.generation()
+    try:
+        result = await db.get_document(ARTICLE_COLLECTION, slug)
+        entry = slug, result.content_as[dict], result.cas
+    except DocumentNotFoundException:
+        query_result = await db.execute(ARTICLE_BY_SLUG, slug=slug)
+        if not query_result:
+            raise ArticleNotFoundException()
+        entry = query_result[0]["docKey"], query_result[0]["doc"], None
+    ARTICLE_CACHE.set_if_current(slug, entry, generation)
+    return entry
+
+
+def invalidate_cached_article(slug: str) -> None:
+    """Removes article document from the article cache of every worker after it has been written, and stops later \
+        reads in this worker from joining a read of it started before the write."""
+    invalidate_cache(ARTICLE_CACHE, slug)
+    ARTICLE_FLIGHTS.forget(slug)
+
+
+async def get_article_list_fields(db, key: str) -> dict:
+    """Gets only the article list fields of an article document and returns them."""
+    result = await db.lookup_in(
+        ARTICLE_COLLECTION, key, [SD.get(field) for field in ARTICLE_LIST_FIELDS]
+    )
+    return {
+        field: result.content_as[ARTICLE_LIST_FIELD_TYPES.get(field, str)](i)
+        for i, field in enumerate(ARTICLE_LIST_FIELDS)
+        if result.exists(i)
+    }
+
+
+async def on_article_document(db, slug: str, operation: Callable[[str], Awaitable]):
+    """Runs KV operation on article document keyed by slug, resolving the key of legacy documents, and returns \
+        operation result."""
     try:
-        query_result = db.query(query, slug=slug)
-        article_data = [r for r in query_result]
-        if not article_data:
+        return await operation(slug)
+    except DocumentNotFoundException:
+        key, _ = await get_article_document(slug, db)
+        if key == slug:
             raise ArticleNotFoundException()
-        else:
-            return ArticleModel(**article_data[0])
+        return await operation(key)
+
+
+async def remove_array_value(
+    db,
+    collection_name: str,
+    key: str,
+    path: str,
+    value,
+    extra_specs: Sequence = (),
+) -> bool:
+    """Removes value from array at path of a document with a CAS guarded sub-document mutation, also applying extra \
+        specs, and returns whether the value was removed."""
+    for _ in range(MAX_CAS_RETRIES):
+        result = await db.lookup_in(collection_name, key, [SD.get(path)])
+        values = result.content_as[list](0) if result.exists(0) else []
+        if value not in values:
+            return False
+        specs = [SD.remove(f"{path}[{values.index(value)}]"), *extra_specs]
+        try:
+            await db.mutate_in(
+                collection_name, key, specs, MutateInOptions(cas=result.cas)
+            )
+            return True
+        except CasMismatchException:
+            continue
+    raise CasMismatchException(message=f"Document {key} kept changing, giving up")
+
+
+async def add_article_favorite(db, slug: str, user_id: str) -> None:
+    """Adds user ID to article's favoritedUserIDs and increments its favoritesCount in one sub-document mutation."""
+    specs = [
+        SD.array_addunique("favoritedUserIDs", user_id, create_parents=True),
+        SD.increment("favoritesCount", 1),
+    ]
+    try:
+        await on_article_document(
+            db, slug, lambda key: db.mutate_in(ARTICLE_COLLECTION, key, specs)
+        )
+    except PathExistsException:
+        # Article is already favorited by the user
+        pass
+
+
+async def remove_article_favorite(db, slug: str, user_id: str) -> None:
+    """Removes user ID from article's favoritedUserIDs and decrements its favoritesCount in one sub-document \
+        mutation."""
+    await on_article_document(
+        db,
+        slug,
+        lambda key: remove_array_value(
+            db,
+            ARTICLE_COLLECTION,
+            key,
+            "favoritedUserIDs",
+            user_id,
+            [SD.decrement("favoritesCount", 1)],
+        ),
+    )
+
+
+async def backfill_favorite_counts(db) -> None:
+    """Sets favoritesCount of every article to the length of its favoritedUserIDs."""
+    await db.execute(ARTICLE_BACKFILL_FAVORITE_COUNTS)
+
+
+async def migrate_embedded_authors(db) -> Tuple[int, int]:
+    """Rewrites articles and comments embedding their whole author user to an author ID and profile snapshot and \
+        returns how many articles and comments were rewritten."""
+    articles = await db.execute(ARTICLE_MIGRATE_AUTHORS)
+    comments = await db.execute(COMMENT_MIGRATE_AUTHORS)
+    return len(articles), len(comments)
+
+
+async def query_articles_by_slug(slug: str, db) -> ArticleModel:
+    """Gets article instance by slug from db and returns article instance."""
+    try:
+        _, article_data = await get_article_document(slug, db)
+        return ArticleModel.from_db(article_data)
+    except ArticleNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(status_code=408, detail="Request timeout")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+
+async def count_articles(
+    db, query: NamedQuery, cache_key: Hashable, **kwargs
+) -> int:
+    """Gets total article count for a list filter from the count cache, falling back to a count query, and returns \
+        count."""
+    count = ARTICLE_COUNT_CACHE.get(cache_key)
+    if count is None:
+        generation = ARTICLE_COUNT_CACHE.generation()
+        query_result = await db.execute(query, **kwargs)
+        count = query_result[0] if query_result else 0
+        ARTICLE_COUNT_CACHE.set_if_current(cache_key, count, generation)
+    return count
+
+
+def invalidate_article_counts(cache_key: Union[Hashable, None] = None) -> None:
+    """Removes count for a list filter from the count cache of every worker, or every count if no filter is \
+        given."""
+    invalidate_cache(ARTICLE_COUNT_CACHE, cache_key)
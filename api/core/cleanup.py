@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Iterable, List
+
+from couchbase.exceptions import DocumentNotFoundException
+
+from ..models.article import ArticleModel
+from ..queries import COMMENT_IDS_BY_ARTICLE
+from ..settings import SETTINGS
+from ..utils.workers import JobQueue
+from .article import COMMENT_COLLECTION
+from .exceptions import ServiceBusyException
+from .feed import remove_article_from_timelines
+from .tag import update_tag_counts
+
+ARTICLE_CLEANUP = JobQueue(
+    SETTINGS.ARTICLE_CLEANUP_WORKERS,
+    SETTINGS.ARTICLE_CLEANUP_QUEUE_LIMIT,
+    "article-cleanup",
+)
+
+
+async def delete_comments(db, comment_ids: Iterable[str]) -> None:
+    """Deletes comments by ID concurrently, ignoring comments already deleted."""
+    results = await asyncio.gather(
+        *(db.delete_document(COMMENT_COLLECTION, id) for id in comment_ids),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(
+            result, DocumentNotFoundException
+        ):
+            raise result
+
+
+async def delete_article_comments(
+    db, slug: str, legacy_ids: List[str], batch_size: int
+) -> None:
+    """Deletes the comments of a deleted article batch_size at a time, those listed in its commentIDs first since \
+        comments written before articleSlug was backfilled are not found by the query."""
+    for i in range(0, len(legacy_ids), batch_size):
+        await delete_comments(db, legacy_ids[i : i + batch_size])
+    cursor = {"cursorCreatedAt": "", "cursorId": ""}
+    while True:
+        rows = await db.execute(
+            COMMENT_IDS_BY_ARTICLE, slug=slug, limit=batch_size, **cursor
+        )
+        if not rows:
+            return
+        await delete_comments(db, [row["id"] for row in rows])
+        cursor = {
+            "cursorCreatedAt": rows[-1]["createdAt"],
+            "cursorId": rows[-1]["id"],
+        }
+
+
+async def cleanup_deleted_article(db, article: ArticleModel) -> None:
+    """Removes what refers to a deleted article: its comments, its tag counts and its timeline entries."""
+    batch_size = SETTINGS.ARTICLE_CLEANUP_BATCH_SIZE
+    await update_tag_counts(db, removed=article.tagList)
+    await delete_article_comments(
+        db, article.slug, list(article.commentIDs), batch_size
+    )
+    await remove_article_from_timelines(
+        db, article.slug, article.authorId, batch_size
+    )
+    logging.info(f"Cleaned up deleted article {article.slug}")
+
+
+def enqueue_article_cleanup(db, article: ArticleModel) -> None:
+    """Queues the cleanup of a deleted article on the background workers."""
+    try:
+        ARTICLE_CLEANUP.enqueue(lambda: cleanup_deleted_article(db, article))
+    except ServiceBusyException:
+        # The article is already deleted, its leftovers are skipped by reads
+        logging.warning(f"Could not queue cleanup of deleted article {article.slug}")
@@ -0,0 +1,107 @@
+import asyncio
+
+import couchbase.subdocument as SD
+from couchbase.exceptions import DocumentNotFoundException
+
+from ..models.article import CommentModel
+from ..queries import ARTICLE_COMMENT_IDS
+from .article import (
+    ARTICLE_COLLECTION,
+    COMMENT_COLLECTION,
+    get_article_document,
+    invalidate_cached_article,
+    on_article_document,
+    remove_array_value,
+)
+from .exceptions import CommentNotFoundException, NotCommentAuthorException
+
+# Concurrent comment writes issued by the articleSlug backfill
+BACKFILL_CONCURRENCY = 64
+
+
+async def append_article_comment_id(db, slug: str, comment_id: str) -> None:
+    """Appends comment ID to commentIDs of article by slug with a sub-document mutation."""
+    specs = [SD.array_append("commentIDs", comment_id, create_parents=True)]
+    await on_article_document(
+        db, slug, lambda key: db.mutate_in(ARTICLE_COLLECTION, key, specs)
+    )
+
+
+async def remove_article_comment_id(db, slug: str, comment_id: str) -> bool:
+    """Removes comment ID from commentIDs of article by slug with a sub-document mutation and returns whether it was \
+        there."""
+    return await on_article_document(
+        db,
+        slug,
+        lambda key: remove_array_value(
+            db, ARTICLE_COLLECTION, key, "commentIDs", comment_id
+        ),
+    )
+
+
+async def add_comment(db, slug: str, comment: CommentModel) -> None:
+    """Inserts comment and appends its ID to the article concurrently, undoing whichever succeeded if the other \
+        failed."""
+    inserted, appended = await asyncio.gather(
+        db.insert_document(
+            COMMENT_COLLECTION, comment.id, comment.model_dump(mode="json")
+        ),
+        append_article_comment_id(db, slug, comment.id),
+        return_exceptions=True,
+    )
+    invalidate_cached_article(slug)
+    if isinstance(inserted, Exception) and not isinstance(appended, Exception):
+        await remove_article_comment_id(db, slug, comment.id)
+    elif isinstance(appended, Exception) and not isinstance(inserted, Exception):
+        await db.delete_document(COMMENT_COLLECTION, comment.id)
+    for result in (appended, inserted):
+        if isinstance(result, Exception):
+            raise result
+
+
+async def delete_comment(db, slug: str, comment_id: str, user_id: str) -> None:
+    """Checks that comment by ID belongs to article by slug and was written by user ID, then deletes it and removes \
+        its ID from the article concurrently."""
+    try:
+        result = await db.get_document(COMMENT_COLLECTION, comment_id)
+    except DocumentNotFoundException:
+        raise CommentNotFoundException()
+    comment = CommentModel.from_db(result.content_as[dict])
+    if comment.articleSlug is None:
+        _, article_data = await get_article_document(slug, db)
+        belongs_to_article = comment_id in article_data.get("commentIDs", [])
+    else:
+        belongs_to_article = comment.articleSlug == slug
+    if not belongs_to_article:
+        raise CommentNotFoundException()
+    if comment.authorId != user_id:
+        raise NotCommentAuthorException()
+    await asyncio.gather(
+        remove_article_comment_id(db, slug, comment_id),
+        db.delete_document(COMMENT_COLLECTION, comment_id),
+    )
+    invalidate_cached_article(slug)
+
+
+async def backfill_comment_articles(db) -> int:
+    """Sets articleSlug of the comments of every article from its commentIDs and returns how many comments were \
+        updated."""
+    updated = 0
+    for article in await db.execute(ARTICLE_COMMENT_IDS):
+        spec = SD.upsert("articleSlug", article["slug"])
+        comment_ids = article["commentIDs"]
+        for start in range(0, len(comment_ids), BACKFILL_CONCURRENCY):
+            results = await asyncio.gather(
+                *(
+                    db.mutate_in(COMMENT_COLLECTION, id, [spec])
+                    for id in comment_ids[start : start + BACKFILL_CONCURRENCY]
+                ),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, DocumentNotFoundException):
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+                updated += 1
+    return updated
@@ -36,6 +36,14 @@ class NotArticleAuthorException(HTTPException):
         )
 
 
+class NotCommentAuthorException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User is not author of the comment",
+        )
+
+
 class NotAuthenticatedException(HTTPException):
     def __init__(self) -> None:
         super().__init__(
@@ -61,3 +69,19 @@ class InvalidCredentialsException(HTTPException):
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Token"},
         )
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+        )
+
+
+class ServiceBusyException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+from typing import List, Union
+
+import couchbase.subdocument as SD
+from couchbase.exceptions import (
+    CasMismatchException,
+    DocumentExistsException,
+    DocumentNotFoundException,
+    PathExistsException,
+)
+from couchbase.options import MutateInOptions, ReplaceOptions
+from couchbase.subdocument import StoreSemantics
+
+from ..models.user import UserModel
+from ..queries import FEED_RECENT_ENTRIES, USER_FOLLOWER_IDS
+from ..settings import SETTINGS
+from .article import ARTICLE_COLLECTION, MAX_CAS_RETRIES, get_article_list_fields
+
+TIMELINE_COLLECTION = "timeline"
+# Authors above FEED_FANOUT_MAX_FOLLOWERS followers, their articles are not fanned out
+PROLIFIC_AUTHORS_KEY = "prolific_authors"
+# Concurrent timeline writes issued by a single fan-out
+FANOUT_CONCURRENCY = 64
+
+
+def timeline_entry(article_data: dict) -> dict:
+    """Returns timeline entry of an encoded article document."""
+    return {
+        "slug": article_data["slug"],
+        "authorId": article_data["authorId"],
+        "createdAt": article_data["createdAt"],
+    }
+
+
+def merge_entries(*entry_lists: List[dict], trim: bool = True) -> List[dict]:
+    """Merges timeline entries newest first, dropping duplicate slugs, and trims them to the timeline size if \
+        trim."""
+    merged = {}
+    for entries in entry_lists:
+        for entry in entries:
+            merged.setdefault(entry["slug"], entry)
+    ordered = sorted(
+        merged.values(), key=lambda e: (e["createdAt"], e["slug"]), reverse=True
+    )
+    return ordered[: SETTINGS.FEED_TIMELINE_MAX_SIZE] if trim else ordered
+
+
+async def query_recent_entries(db, author_ids: List[str], limit: int) -> List[dict]:
+    """Queries db for timeline entries of the most recent articles by authors and returns entries."""
+    if not author_ids:
+        return []
+    return await db.execute(FEED_RECENT_ENTRIES, author_ids=author_ids, limit=limit)
+
+
+async def get_follower_ids(db, author_id: str) -> List[str]:
+    """Queries db for IDs of users following author and returns IDs."""
+    return await db.execute(USER_FOLLOWER_IDS, author_id=author_id)
+
+
+async def get_prolific_author_ids(db) -> List[str]:
+    """Gets IDs of authors whose articles are not fanned out and returns IDs."""
+    try:
+        result = await db.get_document(TIMELINE_COLLECTION, PROLIFIC_AUTHORS_KEY)
+    except DocumentNotFoundException:
+        return []
+    return result.content_as[dict].get("ids", [])
+
+
+async def mark_prolific_author(db, author_id: str) -> None:
+    """Adds author ID to the prolific authors document."""
+    try:
+        await db.mutate_in(
+            TIMELINE_COLLECTION,
+            PROLIFIC_AUTHORS_KEY,
+            [SD.array_addunique("ids", author_id, create_parents=True)],
+            MutateInOptions(store_semantics=StoreSemantics.UPSERT),
+        )
+    except PathExistsException:
+        pass
+
+
+async def prepend_timeline_entry(db, user_id: str, entry: dict) -> None:
+    """Prepends entry to an existing timeline, timelines not built yet are left to be built on read."""
+    try:
+        await db.mutate_in(
+            TIMELINE_COLLECTION, user_id, [SD.array_prepend("entries", entry)]
+        )
+    except DocumentNotFoundException:
+        pass
+
+
+async def fan_out_article(db, article_data: dict) -> None:
+    """Prepends encoded article to the timelines of its author's followers, or marks the author as prolific if they \
+        have too many followers."""
+    if not SETTINGS.FEED_TIMELINES_ENABLED:
+        return
+    entry = timeline_entry(article_data)
+    try:
+        follower_ids = await get_follower_ids(db, entry["authorId"])
+        if len(follower_ids) > SETTINGS.FEED_FANOUT_MAX_FOLLOWERS:
+            await mark_prolific_author(db, entry["authorId"])
+            return
+        for i in range(0, len(follower_ids), FANOUT_CONCURRENCY):
+            await asyncio.gather(
+                *(
+                    prepend_timeline_entry(db, follower_id, entry)
+                    for follower_id in follower_ids[i : i + FANOUT_CONCURRENCY]
+                )
+            )
+    except Exception as e:
+        # Timelines that miss the article are repaired when they are rebuilt
+        logging.warning(f"Could not fan out article {entry['slug']}. Error: {e}")
+
+
+async def build_timeline(db, user: UserModel) -> List[dict]:
+    """Queries db for the most recent articles of followed authors, stores them as user's timeline and returns \
+        entries."""
+    entries = await query_recent_entries(
+        db, list(user.followingIds), SETTINGS.FEED_TIMELINE_MAX_SIZE
+    )
+    try:
+        await db.insert_document(TIMELINE_COLLECTION, user.id, {"entries": entries})
+    except DocumentExistsException:
+        # Built concurrently by another request
+        pass
+    return entries
+
+
+async def update_timeline(db, user_id: str, update) -> None:
+    """Applies update to the entries of an existing timeline with a CAS guarded replace."""
+    for _ in range(MAX_CAS_RETRIES):
+        try:
+            result = await db.get_document(TIMELINE_COLLECTION, user_id)
+        except DocumentNotFoundException:
+            return
+        entries = await update(result.content_as[dict].get("entries", []))
+        try:
+            await db.replace_document(
+                TIMELINE_COLLECTION,
+                user_id,
+                {"entries": entries},
+                ReplaceOptions(cas=result.cas),
+            )
+            return
+        except CasMismatchException:
+            continue
+    # Give up and let the timeline be rebuilt on the next read
+    await db.delete_document(TIMELINE_COLLECTION, user_id)
+
+
+async def trim_entries(entries: List[dict]) -> List[dict]:
+    return merge_entries(entries)
+
+
+async def add_author_to_timeline(db, user_id: str, author_id: str) -> None:
+    """Backfills the most recent articles of a newly followed author into user's timeline."""
+    if not SETTINGS.FEED_TIMELINES_ENABLED:
+        return
+
+    async def merge_author(entries: List[dict]) -> List[dict]:
+        author_entries = await query_recent_entries(
+            db, [author_id], SETTINGS.FEED_TIMELINE_MAX_SIZE
+        )
+        return merge_entries(entries, author_entries)
+
+    await update_timeline(db, user_id, merge_author)
+
+
+async def remove_author_from_timeline(db, user_id: str, author_id: str) -> None:
+    """Removes the articles of an unfollowed author from user's timeline."""
+    if not SETTINGS.FEED_TIMELINES_ENABLED:
+        return
+
+    async def drop_author(entries: List[dict]) -> List[dict]:
+        return [e for e in entries if e["authorId"] != author_id]
+
+    await update_timeline(db, user_id, drop_author)
+
+
+async def remove_article_from_timelines(
+    db, slug: str, author_id: str, batch_size: int
+) -> None:
+    """Removes the entry of a deleted article from the timelines of its author's followers, batch_size timelines at \
+        a time."""
+    if not SETTINGS.FEED_TIMELINES_ENABLED:
+        return
+
+    async def drop_article(entries: List[dict]) -> List[dict]:
+        return [e for e in entries if e["slug"] != slug]
+
+    follower_ids = await get_follower_ids(db, author_id)
+    for i in range(0, len(follower_ids), batch_size):
+        await asyncio.gather(
+            *(
+                update_timeline(db, follower_id, drop_article)
+                for follower_id in follower_ids[i : i + batch_size]
+            )
+        )
+
+
+async def get_article_document_content(db, key: str) -> dict:
+    result = await db.get_document(ARTICLE_COLLECTION, key)
+    return result.content_as[dict]
+
+
+async def get_timeline_articles(
+    db, user: UserModel, limit: int, offset: int, include_body: bool = False
+) -> Union[List[dict], None]:
+    """Gets a page of user's feed from their timeline, merged with the recent articles of followed prolific authors, \
+        and returns article documents, or only their list fields unless include_body, or none if the page is not \
+        covered by the timeline."""
+    if not SETTINGS.FEED_TIMELINES_ENABLED:
+        return None
+    following = set(user.followingIds)
+    try:
+        result = await db.get_document(TIMELINE_COLLECTION, user.id)
+        entries = result.content_as[dict].get("entries", [])
+    except DocumentNotFoundException:
+        entries = await build_timeline(db, user)
+    if len(entries) > SETTINGS.FEED_TIMELINE_MAX_SIZE:
+        # Fan-out only prepends, trim timelines that outgrew their size on read
+        entries = merge_entries(entries)
+        await update_timeline(db, user.id, trim_entries)
+    followed_entries = [e for e in entries if e["authorId"] in following]
+    if (
+        len(entries) >= SETTINGS.FEED_TIMELINE_MAX_SIZE
+        and offset + limit > len(followed_entries)
+    ):
+        # Older articles were trimmed from the timeline, the query serves this page
+        return None
+    prolific_ids = [id for id in await get_prolific_author_ids(db) if id in following]
+    prolific_entries = await query_recent_entries(db, prolific_ids, offset + limit)
+    # Not trimmed, the followed entries cover the page but prolific ones push them down
+    entries = merge_entries(followed_entries, prolific_entries, trim=False)
+    page = entries[offset : offset + limit]
+    if include_body:
+        fetches = (get_article_document_content(db, e["slug"]) for e in page)
+    else:
+        fetches = (get_article_list_fields(db, e["slug"]) for e in page)
+    results = await asyncio.gather(*fetches, return_exceptions=True)
+    articles = []
+    for result in results:
+        if isinstance(result, DocumentNotFoundException):
+            continue
+        if isinstance(result, Exception):
+            raise result
+        articles.append(result)
+    return articles
@@ -0,0 +1,80 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List
+
+import couchbase.subdocument as SD
+from couchbase.exceptions import DocumentNotFoundException
+from couchbase.options import MutateInOptions
+from couchbase.subdocument import StoreSemantics
+
+from ..queries import TAG_COUNTS
+from ..utils.singleflight import SingleFlight
+
+TAG_COLLECTION = "tag"
+TAG_COUNTS_KEY = "tag_counts"
+# Couchbase rejects sub-document requests with more than 16 operations
+MAX_SUBDOC_SPECS = 16
+
+# Reads of the tag counts document
+TAG_FLIGHTS = SingleFlight("tag")
+
+
+def tag_count_path(tag: str) -> str:
+    """Returns the sub-document path of a tag's counter, escaping backticks in the tag."""
+    escaped = tag.replace("`", "``")
+    return f"counts.`{escaped}`"
+
+
+async def update_tag_counts(
+    db, added: Iterable[str] = (), removed: Iterable[str] = ()
+) -> None:
+    """Applies the tag deltas of an article write to the tag counts document with sub-document counters."""
+    deltas = Counter(set(added))
+    deltas.subtract(set(removed))
+    specs = []
+    for tag, delta in deltas.items():
+        path = tag_count_path(tag)
+        if delta > 0:
+            specs.append(SD.increment(path, delta, create_parents=True))
+        elif delta < 0:
+            specs.append(SD.decrement(path, -delta, create_parents=True))
+    try:
+        for i in range(0, len(specs), MAX_SUBDOC_SPECS):
+            await db.mutate_in(
+                TAG_COLLECTION,
+                TAG_COUNTS_KEY,
+                specs[i : i + MAX_SUBDOC_SPECS],
+                MutateInOptions(store_semantics=StoreSemantics.UPSERT),
+            )
+    except Exception as e:
+        # The article write already succeeded, rebuilding the tag counts repairs any drift
+        logging.warning(f"Could not update tag counts. Error: {e}")
+
+
+async def get_tag_counts(db) -> Dict[str, int]:
+    """Gets tag counts document, sharing one read between concurrent callers, and returns counts of tags used by at \
+        least one article."""
+    return await TAG_FLIGHTS.do(TAG_COUNTS_KEY, lambda: fetch_tag_counts(db))
+
+
+async def fetch_tag_counts(db) -> Dict[str, int]:
+    try:
+        result = await db.get_document(TAG_COLLECTION, TAG_COUNTS_KEY)
+    except DocumentNotFoundException:
+        return {}
+    counts = result.content_as[dict].get("counts", {})
+    return {tag: count for tag, count in counts.items() if count > 0}
+
+
+async def get_popular_tags(db) -> List[str]:
+    """Gets tag counts and returns distinct tags ordered by article count."""
+    counts = await get_tag_counts(db)
+    return sorted(counts, key=lambda tag: (-counts[tag], tag))
+
+
+async def rebuild_tag_counts(db) -> Dict[str, int]:
+    """Recounts tags over all articles, replaces tag counts document and returns the counts."""
+    query_result = await db.execute(TAG_COUNTS)
+    counts = {r["tag"]: r["count"] for r in query_result}
+    await db.upsert_document(TAG_COLLECTION, TAG_COUNTS_KEY, {"counts": counts})
+    return counts
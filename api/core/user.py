@@ -1,37 +1,271 @@
-from typing import Union
+import asyncio
+from typing import Dict, Iterable, List, Sequence, Union
 
+import couchbase.subdocument as SD
+from couchbase.exceptions import (
+    CasMismatchException,
+    DocumentExistsException,
+    DocumentNotFoundException,
+    PathExistsException,
+)
+from couchbase.options import RemoveOptions, ReplaceOptions
 from fastapi import HTTPException, status
 
-from ..models.user import UserModel
+from ..models.article import AuthoredModel
+from ..models.user import AuthorModel, UserModel
+from ..queries import USER_BY_EMAIL, USER_BY_USERNAME, USER_LOOKUP_FIELDS, NamedQuery
+from ..settings import SETTINGS
+from ..utils.cache import TTLCache
+from ..utils.invalidation import invalidate_cache
+from .article import MAX_CAS_RETRIES, remove_array_value
 from .exceptions import UserNotFoundException
 
+USER_COLLECTION = "user"
+# Secondary key documents mapping `username::<name>` and `email::<addr>` to user IDs
+LOOKUP_COLLECTION = "lookup"
+
+# Recently authenticated users, keyed by user ID
+USER_CACHE = TTLCache(
+    SETTINGS.USER_CACHE_MAX_SIZE, SETTINGS.USER_CACHE_TTL_SECONDS, name="user"
+)
+# Author profiles of articles and comments, keyed by user ID
+PROFILE_CACHE = TTLCache(
+    SETTINGS.PROFILE_CACHE_MAX_SIZE, SETTINGS.PROFILE_CACHE_TTL_SECONDS, name="profile"
+)
+
+
+async def get_user_by_id(db, id: str) -> UserModel:
+    """Gets user instance by ID with a KV get and returns instance."""
+    try:
+        result = await db.get_document(USER_COLLECTION, id)
+    except DocumentNotFoundException:
+        raise UserNotFoundException()
+    return UserModel.from_db(result.content_as[dict])
+
+
+def username_lookup_key(username: str) -> str:
+    return f"username::{username}"
+
+
+def email_lookup_key(email: str) -> str:
+    return f"email::{email.strip().lower()}"
+
+
+def user_lookup_keys(user: UserModel) -> List[str]:
+    """Returns keys of the lookup documents of a user instance."""
+    return [username_lookup_key(user.username), email_lookup_key(user.email)]
+
+
+async def claim_user_lookups(db, user_id: str, keys: List[str]) -> None:
+    """Inserts lookup documents for user ID, raising DocumentExistsException if any key belongs to another user."""
+    results = await asyncio.gather(
+        *(
+            db.insert_document(LOOKUP_COLLECTION, key, {"userId": user_id})
+            for key in keys
+        ),
+        return_exceptions=True,
+    )
+    claimed = [k for k, r in zip(keys, results) if not isinstance(r, Exception)]
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        await release_user_lookups(db, user_id, claimed)
+        raise errors[0]
+
+
+async def release_user_lookup(db, user_id: str, key: str) -> None:
+    """Removes lookup document by key with a CAS guarded remove if it belongs to user ID, leaving lookups claimed by \
+        other users in place."""
+    for _ in range(MAX_CAS_RETRIES):
+        try:
+            result = await db.get_document(LOOKUP_COLLECTION, key)
+            if result.content_as[dict].get("userId") != user_id:
+                return
+            await db.delete_document(
+                LOOKUP_COLLECTION, key, RemoveOptions(cas=result.cas)
+            )
+            return
+        except DocumentNotFoundException:
+            return
+        except CasMismatchException:
+            continue
+    raise CasMismatchException(message=f"Lookup {key} kept changing, giving up")
+
+
+async def release_user_lookups(db, user_id: str, keys: List[str]) -> None:
+    """Removes the lookup documents of user ID, ignoring ones that do not exist or belong to other users."""
+    results = await asyncio.gather(
+        *(release_user_lookup(db, user_id, key) for key in keys),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+async def get_user_by_lookup(
+    db, key: str, fallback_query: NamedQuery, value: str
+) -> UserModel:
+    """Gets user ID from lookup document by key, then user instance by ID, and returns instance. Users without lookup \
+        documents are found with the fallback query if it is enabled."""
+    try:
+        result = await db.get_document(LOOKUP_COLLECTION, key)
+        return await get_user_by_id(db, result.content_as[dict]["userId"])
+    except DocumentNotFoundException:
+        if not SETTINGS.USER_LOOKUP_QUERY_FALLBACK:
+            raise UserNotFoundException()
+    query_result = await db.execute(fallback_query, value=value)
+    if not query_result:
+        raise UserNotFoundException()
+    return UserModel.from_db(query_result[0])
+
+
+async def get_user_by_username(db, username: str) -> UserModel:
+    """Gets user instance by username through its lookup document and returns instance."""
+    return await get_user_by_lookup(
+        db, username_lookup_key(username), USER_BY_USERNAME, username
+    )
+
+
+async def get_user_by_email(db, email: str) -> UserModel:
+    """Gets user instance by email through its lookup document and returns instance."""
+    return await get_user_by_lookup(db, email_lookup_key(email), USER_BY_EMAIL, email)
+
+
+async def backfill_user_lookups(db) -> int:
+    """Inserts missing lookup documents for every user and returns how many were inserted."""
+    inserted = 0
+    for user in await db.execute(USER_LOOKUP_FIELDS):
+        keys = [username_lookup_key(user["username"]), email_lookup_key(user["email"])]
+        for key in keys:
+            try:
+                await db.insert_document(LOOKUP_COLLECTION, key, {"userId": user["id"]})
+                inserted += 1
+            except DocumentExistsException:
+                continue
+    return inserted
+
+
+async def get_profile_by_id(db, id: str) -> Union[AuthorModel, None]:
+    """Gets the profile of user by ID with a KV get and returns it, or none if the user does not exist."""
+    try:
+        result = await db.get_document(USER_COLLECTION, id)
+    except DocumentNotFoundException:
+        return None
+    return AuthorModel.from_db(result.content_as[dict])
+
+
+async def get_profiles_by_ids(db, ids: Iterable[str]) -> Dict[str, AuthorModel]:
+    """Gets profiles for the deduplicated IDs from the profile cache, falling back to concurrent KV gets, and \
+        returns the ones of existing users keyed by ID."""
+    profiles = {id: PROFILE_CACHE.get(id) for id in dict.fromkeys(ids)}
+    missing_ids = [id for id, profile in profiles.items() if profile is None]
+    generation = PROFILE_CACHE.generation()
+    fetched = await asyncio.gather(*(get_profile_by_id(db, id) for id in missing_ids))
+    for id, profile in zip(missing_ids, fetched):
+        if profile is not None:
+            PROFILE_CACHE.set_if_current(id, profile, generation)
+        profiles[id] = profile
+    return {id: profile for id, profile in profiles.items() if profile is not None}
+
+
+async def get_author_profiles(
+    db, documents: Sequence[AuthoredModel]
+) -> Dict[str, AuthorModel]:
+    """Gets the current profiles of the authors of articles or comments and returns them keyed by author ID, using \
+        the snapshot stored on a document for authors that no longer exist."""
+    profiles = await get_profiles_by_ids(db, (d.authorId for d in documents))
+    for document in documents:
+        if document.authorId not in profiles and document.author is not None:
+            profiles[document.authorId] = document.author
+    return profiles
+
+
+async def get_cached_user_by_id(db, id: str) -> UserModel:
+    """Gets user instance by ID from the user cache, falling back to the db, and returns a copy of the instance."""
+    user = USER_CACHE.get(id)
+    if user is None:
+        generation = USER_CACHE.generation()
+        user = await get_user_by_id(db, id)
+        USER_CACHE.set_if_current(id, user, generation)
+    return user.model_copy(deep=True)
+
+
+def invalidate_cached_user(id: str) -> None:
+    """Removes user instance and profile from the user caches of every worker after its document has been written."""
+    invalidate_cache(USER_CACHE, id)
+    invalidate_cache(PROFILE_CACHE, id)
+
+
+async def add_following_id(db, user_id: str, followed_id: str) -> None:
+    """Adds followed user ID to followingIds of user by ID with a sub-document mutation."""
+    try:
+        await db.mutate_in(
+            USER_COLLECTION,
+            user_id,
+            [SD.array_addunique("followingIds", followed_id, create_parents=True)],
+        )
+    except PathExistsException:
+        pass
+    invalidate_cached_user(user_id)
+
+
+async def remove_following_id(db, user_id: str, followed_id: str) -> None:
+    """Removes followed user ID from followingIds of user by ID with a sub-document mutation."""
+    await remove_array_value(db, USER_COLLECTION, user_id, "followingIds", followed_id)
+    invalidate_cached_user(user_id)
+
+
+async def update_user_document(db, user_id: str, patch: dict) -> UserModel:
+    """Applies patch to a fresh read of user by ID, moves its lookup documents if username or email changed and \
+        writes it back with a CAS guarded replace, then returns the updated instance."""
+    for _ in range(MAX_CAS_RETRIES):
+        try:
+            result = await db.get_document(USER_COLLECTION, user_id)
+        except DocumentNotFoundException:
+            raise UserNotFoundException()
+        user = UserModel.from_db(result.content_as[dict])
+        previous_keys = user_lookup_keys(user)
+        user = user.model_copy(update=patch)
+        current_keys = user_lookup_keys(user)
+        new_keys = [key for key in current_keys if key not in previous_keys]
+        stale_keys = [key for key in previous_keys if key not in current_keys]
+        await claim_user_lookups(db, user_id, new_keys)
+        try:
+            await db.replace_document(
+                USER_COLLECTION,
+                user_id,
+                user.model_dump(),
+                ReplaceOptions(cas=result.cas),
+            )
+        except CasMismatchException:
+            await release_user_lookups(db, user_id, new_keys)
+            continue
+        except Exception:
+            await release_user_lookups(db, user_id, new_keys)
+            raise
+        await release_user_lookups(db, user_id, stale_keys)
+        invalidate_cached_user(user_id)
+        return user
+    raise CasMismatchException(message=f"User {user_id} kept changing, giving up")
+
 
 async def query_users_db(
     db,
     id: Union[str, None] = None,
     username: Union[str, None] = None,
 ) -> UserModel:
-    """Query db for user instance by ID or username and returns instance."""
-    if id is not None:
-        query = """
-            SELECT `user`.* FROM `user` WHERE `user`.id=$id;
-        """
-    elif username is not None:
-        query = """
-            SELECT `user`.* FROM `user` WHERE `user`.username=$username;
-        """
-    else:
+    """Gets user instance by ID or by username through its lookup document and returns instance."""
+    if id is None and username is None:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            details="No ID or username provided",
+            detail="No ID or username provided",
         )
     try:
-        queryResult = db.query(query, id=id, username=username)
-        response_data = [r for r in queryResult]
-        if not response_data:
-            raise UserNotFoundException()
-        else:
-            return UserModel(**response_data[0])
+        if id is not None:
+            return await get_user_by_id(db, id)
+        return await get_user_by_username(db, username)
+    except UserNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
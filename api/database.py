@@ -2,20 +2,46 @@ from __future__ import annotations
 
 import logging
 import os
+import time
 from datetime import timedelta
 from functools import cache
+from typing import Awaitable, TypeVar, Union
 
+from acouchbase.cluster import Cluster
 from couchbase.auth import PasswordAuthenticator
-from couchbase.cluster import Cluster
 from couchbase.exceptions import CouchbaseException
-from couchbase.options import ClusterOptions
+from couchbase.options import ClusterOptions, QueryOptions
 from dotenv import load_dotenv
 
 from .core.exceptions import EmptyEnvironmentVariableError
+from .queries import NamedQuery
+from .utils.metrics import observe_db_operation
+from .utils.tracing import trace_db_call
+from .utils.singleflight import SingleFlight, freeze
+
+# Executions of read-only named queries, keyed by name and parameters
+QUERY_FLIGHTS = SingleFlight("query")
+
+T = TypeVar("T")
+
+
+def record_db_call(
+    operation: str,
+    name: str,
+    started_at: float,
+    error: bool = False,
+    params: Union[dict, None] = None,
+    rows: Union[int, None] = None,
+) -> None:
+    """Records a db call on collection or query name that started at perf counter started_at in the metrics and \
+        the trace of the current request."""
+    seconds = time.perf_counter() - started_at
+    observe_db_operation(operation, name, seconds, error)
+    trace_db_call(operation, name, seconds, params, rows)
 
 
 class CouchbaseClient(object):
-    """Class to handle interactions with Couchbase cluster"""
+    """Class to handle asynchronous interactions with Couchbase cluster"""
 
     def __init__(
         self,
@@ -33,9 +59,8 @@ class CouchbaseClient(object):
         self.password = password
         self.bucket_name = bucket_name
         self.scope_name = scope_name
-        self.connect()
 
-    def connect(self) -> None:
+    async def connect(self) -> None:
         """Connect to the Couchbase cluster"""
         if self.cluster:
             return
@@ -44,12 +69,13 @@ class CouchbaseClient(object):
             auth = PasswordAuthenticator(self.username, self.password)
             cluster_opts = ClusterOptions(auth)
             cluster_opts.apply_profile("wan_development")
-            self.cluster = Cluster(self.conn_str, cluster_opts)
-            self.cluster.wait_until_ready(timedelta(seconds=5))
+            self.cluster = await Cluster.connect(self.conn_str, cluster_opts)
+            await self.cluster.wait_until_ready(timedelta(seconds=5))
             self.bucket = self.cluster.bucket(self.bucket_name)
+            await self.bucket.on_connect()
         except CouchbaseException as error:
             self.connection_error(error)
-        if not self.check_scope_exists():
+        if not await self.check_scope_exists():
             logging.warning(
                 "Scope does not exist in the bucket. Ensure that you have the scope in your bucket."
             )
@@ -60,11 +86,12 @@ class CouchbaseClient(object):
         logging.error(f"Could not connect to the cluster. Error: {error}")
         logging.warning("Ensure that you have the bucket loaded in the cluster.")
 
-    def check_scope_exists(self) -> bool:
+    async def check_scope_exists(self) -> bool:
         """Check if the scope exists in the bucket"""
         try:
             scopes_in_bucket = [
-                scope.name for scope in self.bucket.collections().get_all_scopes()
+                scope.name
+                for scope in await self.bucket.collections().get_all_scopes()
             ]
             return self.scope_name in scopes_in_bucket
         except Exception:
@@ -73,38 +100,134 @@ class CouchbaseClient(object):
             )
             return False
 
-    def close(self) -> None:
+    async def close(self) -> None:
         """Close the connection to the Couchbase cluster"""
         if self.cluster:
             try:
-                self.cluster.close()
+                await self.cluster.close()
             except Exception as e:
                 logging.error(f"Error closing cluster. \nError: {e}")
 
-    def get_document(self, collection_name: str, key: str):
+    async def _collection(self, collection_name: str):
+        """Get collection from the scope, connecting lazily if needed"""
+        if self.scope is None:
+            await self.connect()
+        return self.scope.collection(collection_name)
+
+    async def _timed(self, operation: str, name: str, call: Awaitable[T]) -> T:
+        """Awaits call and records its latency as operation on collection or query name"""
+        started_at = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            record_db_call(operation, name, started_at, error=True)
+            raise
+        record_db_call(operation, name, started_at)
+        return result
+
+    async def get_document(self, collection_name: str, key: str):
         """Get document by key using KV operation"""
-        return self.scope.collection(collection_name).get(key)
+        collection = await self._collection(collection_name)
+        return await self._timed("get", collection_name, collection.get(key))
 
-    def insert_document(self, collection_name: str, key: str, doc: dict):
+    async def insert_document(self, collection_name: str, key: str, doc: dict):
         """Insert document using KV operation"""
-        return self.scope.collection(collection_name).insert(key, doc)
+        collection = await self._collection(collection_name)
+        return await self._timed("insert", collection_name, collection.insert(key, doc))
 
-    def delete_document(self, collection_name: str, key: str):
+    async def delete_document(
+        self, collection_name: str, key: str, *options, **kwargs
+    ):
         """Delete document using KV operation"""
-        return self.scope.collection(collection_name).remove(key)
+        collection = await self._collection(collection_name)
+        return await self._timed(
+            "remove", collection_name, collection.remove(key, *options, **kwargs)
+        )
 
-    def upsert_document(self, collection_name: str, key: str, doc: dict):
+    async def replace_document(
+        self, collection_name: str, key: str, doc: dict, *options, **kwargs
+    ):
+        """Replace existing document using KV operation"""
+        collection = await self._collection(collection_name)
+        return await self._timed(
+            "replace", collection_name, collection.replace(key, doc, *options, **kwargs)
+        )
+
+    async def upsert_document(self, collection_name: str, key: str, doc: dict):
         """Upsert document using KV operation"""
-        return self.scope.collection(collection_name).upsert(key, doc)
+        collection = await self._collection(collection_name)
+        return await self._timed("upsert", collection_name, collection.upsert(key, doc))
 
-    def query(self, sql_query, *options, **kwargs):
-        """Query Couchbase using SQL++"""
-        return self.scope.query(sql_query, *options, **kwargs)
+    async def lookup_in(
+        self, collection_name: str, key: str, specs, *options, **kwargs
+    ):
+        """Read parts of a document using sub-document operations"""
+        collection = await self._collection(collection_name)
+        return await self._timed(
+            "lookup_in",
+            collection_name,
+            collection.lookup_in(key, specs, *options, **kwargs),
+        )
+
+    async def mutate_in(
+        self, collection_name: str, key: str, specs, *options, **kwargs
+    ):
+        """Mutate parts of a document using sub-document operations"""
+        collection = await self._collection(collection_name)
+        return await self._timed(
+            "mutate_in",
+            collection_name,
+            collection.mutate_in(key, specs, *options, **kwargs),
+        )
+
+    async def execute(self, named_query: NamedQuery, **params) -> list:
+        """Execute a registered SQL++ query as prepared statement and return all rows. Concurrent executions of a \
+            read-only query with the same parameters share one execution and its rows"""
+        if not named_query.read_only:
+            return await self._execute(named_query, params)
+        return await QUERY_FLIGHTS.do(
+            (named_query.name, freeze(params)),
+            lambda: self._execute(named_query, params),
+        )
+
+    async def _execute(self, named_query: NamedQuery, params: dict) -> list:
+        if self.scope is None:
+            await self.connect()
+        started_at = time.perf_counter()
+        try:
+            result = self.scope.query(
+                named_query.statement,
+                QueryOptions(adhoc=False, named_parameters=params),
+            )
+            rows = [row async for row in result]
+        except Exception:
+            record_db_call(
+                "query", named_query.name, started_at, error=True, params=params
+            )
+            raise
+        record_db_call(
+            "query", named_query.name, started_at, params=params, rows=len(rows)
+        )
+        return rows
+
+    async def query(self, sql_query, *options, **kwargs) -> list:
+        """Query Couchbase using ad hoc SQL++ and return all rows"""
+        if self.scope is None:
+            await self.connect()
+        started_at = time.perf_counter()
+        try:
+            result = self.scope.query(sql_query, *options, **kwargs)
+            rows = [row async for row in result]
+        except Exception:
+            record_db_call("query", "adhoc", started_at, error=True)
+            raise
+        record_db_call("query", "adhoc", started_at, rows=len(rows))
+        return rows
 
 
 @cache
 def get_db():
-    """Get Couchbase client"""
+    """Get Couchbase client, the connection is opened by the app lifespan"""
     load_dotenv()
     env_vars = [
         "DB_CONN_STR",
@@ -0,0 +1,148 @@
+"""Global secondary indexes the API's queries rely on.
+
+`create_indexes` creates the declared indexes idempotently with a deferred build and
+then builds them together. `audit_queries` statically checks that every statement in
+the query registry has a predicate on the leading key of one of the declared indexes
+of its collection, as the query service only selects an index for such statements.
+`explain_queries` confirms on the cluster that no plan uses a primary scan.
+"""
+
+import json
+import re
+from typing import Dict, List, Tuple, Union
+
+from .queries import QUERIES, NamedQuery
+
+# Key of an array index over a path, e.g. "DISTINCT ARRAY t FOR t IN tagList END"
+ARRAY_KEY_PATTERN = re.compile(r"DISTINCT ARRAY (\w+) FOR \1 IN ([\w.]+) END")
+
+
+class IndexDefinition(object):
+    """Secondary index on a collection of the scope"""
+
+    def __init__(self, name: str, collection: str, keys: List[str]):
+        self.name = name
+        self.collection = collection
+        self.keys = keys
+
+    @property
+    def leading_key(self) -> Tuple[str, str]:
+        """Returns kind ("array" or "scalar") and path of the index's leading key."""
+        match = ARRAY_KEY_PATTERN.fullmatch(self.keys[0])
+        if match:
+            return "array", match.group(2)
+        return "scalar", self.keys[0]
+
+    def create_statement(self) -> str:
+        keys = ", ".join(self.keys)
+        return (
+            f"CREATE INDEX `{self.name}` IF NOT EXISTS ON `{self.collection}`({keys}) "
+            'WITH {"defer_build": true};'
+        )
+
+
+INDEXES = [
+    # Article lists ordered by createdAt and keyset pagination, all articles
+    IndexDefinition("idx_article_created", "article", ["createdAt", "slug"]),
+    # Slug query fallback for legacy article documents
+    IndexDefinition("idx_article_slug", "article", ["slug"]),
+    # Author filter of the article list, feed and feed timelines, covers their counts
+    IndexDefinition("idx_article_author", "article", ["authorId", "createdAt", "slug"]),
+    # Tag filter of the article list, covers its count
+    IndexDefinition(
+        "idx_article_tags",
+        "article",
+        ["DISTINCT ARRAY t FOR t IN tagList END", "createdAt", "slug"],
+    ),
+    # Favorited filter of the article list, covers its count
+    IndexDefinition(
+        "idx_article_favorited",
+        "article",
+        ["DISTINCT ARRAY f FOR f IN favoritedUserIDs END", "createdAt", "slug"],
+    ),
+    # Comments of an article ordered by createdAt and keyset pagination
+    IndexDefinition(
+        "idx_comment_article", "comment", ["articleSlug", "createdAt", "id"]
+    ),
+    IndexDefinition("idx_user_username", "user", ["username"]),
+    IndexDefinition("idx_user_email", "user", ["email"]),
+    # Followers of an author for feed fan-out
+    IndexDefinition(
+        "idx_user_following", "user", ["DISTINCT ARRAY f FOR f IN followingIds END"]
+    ),
+]
+
+
+def collection_of(statement: str) -> Union[str, None]:
+    """Returns the collection a statement reads from or updates."""
+    match = re.search(r"\b(?:FROM|UPDATE)\s+(\w+)", statement)
+    return match.group(1) if match else None
+
+
+def predicate_keys(statement: str) -> List[Tuple[str, str]]:
+    """Returns kind and path of the index keys that could serve the statement's WHERE clause."""
+    match = re.search(
+        r"\bWHERE\b(.*?)(?:\bORDER BY\b|\bGROUP BY\b|\bLIMIT\b|;|$)", statement, re.S
+    )
+    if not match:
+        return []
+    where = match.group(1)
+    keys = [
+        ("array", path)
+        for path in re.findall(r"\bANY\s+\w+\s+IN\s+\w+\.([\w.]+)\s+SATISFIES\b", where)
+    ]
+    keys += [
+        ("scalar", path)
+        for path in re.findall(
+            r"\b\w+\.([\w.]+)\s*(?:=|<=|>=|<|>|\bIN\b|\bIS NOT\b)", where
+        )
+    ]
+    return keys
+
+
+def audit_query(query: NamedQuery, indexes: List[IndexDefinition] = INDEXES) -> bool:
+    """Returns whether a declared index can serve the named query."""
+    if query.full_scan:
+        return True
+    statement = query.statement.replace("`", "")
+    collection = collection_of(statement)
+    leading_keys = {i.leading_key for i in indexes if i.collection == collection}
+    return any(key in leading_keys for key in predicate_keys(statement))
+
+
+def audit_queries(indexes: List[IndexDefinition] = INDEXES) -> List[str]:
+    """Returns names of the registered queries no declared index can serve."""
+    return [name for name, q in QUERIES.items() if not audit_query(q, indexes)]
+
+
+async def create_indexes(db, indexes: List[IndexDefinition] = INDEXES) -> None:
+    """Creates the missing declared indexes with a deferred build and builds every deferred index."""
+    for index in indexes:
+        await db.query(index.create_statement())
+    for collection in sorted({index.collection for index in indexes}):
+        await db.query(
+            f"""
+            BUILD INDEX ON `{collection}`((
+                SELECT RAW name
+                FROM system:indexes
+                WHERE bucket_id="{db.bucket_name}"
+                AND scope_id="{db.scope_name}"
+                AND keyspace_id="{collection}"
+                AND state="deferred"
+            ));
+            """
+        )
+
+
+async def explain_queries(db) -> Dict[str, List[str]]:
+    """Explains every registered query on the cluster and returns the scan operators of queries using a primary \\
+        scan."""
+    primary_scans = {}
+    for name, query in QUERIES.items():
+        if query.full_scan:
+            continue
+        plan = await db.query(f"EXPLAIN {query.statement.strip()}")
+        operators = re.findall(r'"#operator":\s*"(\w*Scan\w*)"', json.dumps(plan))
+        if any(op.startswith("PrimaryScan") for op in operators):
+            primary_scans[name] = operators
+    return primary_scans
@@ -5,14 +5,22 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import PlainTextResponse, RedirectResponse
 
+from .core.cleanup import ARTICLE_CLEANUP
 from .database import get_db
+from .settings import SETTINGS
+from .utils.cache import get_cache_stats
+from .utils.invalidation import INVALIDATION_CHANNEL
+from .utils.metrics import MetricsMiddleware, render_metrics
+from .utils.tracing import TracingMiddleware
+from .utils.singleflight import get_singleflight_stats
 from .routers.article import router as article_router
 from .routers.comment import router as comment_router
 from .routers.profile import router as profile_router
 from .routers.tag import router as tag_router
 from .routers.user import router as user_router
+from .utils.security import PASSWORD_HASHER
 
 
 # Initialize couchbase connection
@@ -21,8 +29,14 @@ async def lifespan(app: FastAPI):
     """Method that gets called upon app initialization \
         to initialize couchbase connection & close the connection on exit"""
     db = get_db()
+    await db.connect()
+    INVALIDATION_CHANNEL.start()
+    ARTICLE_CLEANUP.start()
     yield
-    db.close()
+    await ARTICLE_CLEANUP.stop()
+    INVALIDATION_CHANNEL.stop()
+    await db.close()
+    PASSWORD_HASHER.shutdown()
 
 
 api = FastAPI(
@@ -55,6 +69,13 @@ api.add_middleware(
     allow_methods= allowed_methods.split(","),
     allow_headers= allowed_headers.split(","),
 )
+api.add_middleware(
+    TracingMiddleware,
+    slow_seconds=SETTINGS.SLOW_REQUEST_SECONDS,
+    db_call_budget=SETTINGS.REQUEST_DB_CALL_BUDGET,
+    server_timing=SETTINGS.SERVER_TIMING_ENABLED,
+)
+api.add_middleware(MetricsMiddleware)
 
 
 @api.get("/health", tags=["health"])
@@ -62,6 +83,24 @@ async def health_check():
     return {"status": "ok"}
 
 
+@api.get("/health/cache", tags=["health"])
+async def cache_stats():
+    """Returns size and hit/miss counters of the in-process caches."""
+    return get_cache_stats()
+
+
+@api.get("/health/singleflight", tags=["health"])
+async def singleflight_stats():
+    """Returns counts of started and collapsed db reads of the single flight groups."""
+    return get_singleflight_stats()
+
+
+@api.get("/metrics", tags=["health"])
+async def metrics():
+    """Returns request latencies by route, db operation latencies and cache counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 api.include_router(article_router, tags=["articles"])
 api.include_router(comment_router, tags=["comments"])
 api.include_router(profile_router, tags=["profiles"])
@@ -1,32 +1,77 @@
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Tuple, Union
 
 from pydantic import BaseModel, Field, root_validator
+from pydantic_core import CoreSchema, SchemaValidator
 
 from .identifier import generate_id, generate_random_str
-from .user import UserModel
+from .user import AuthorModel
 
 
-class CommentModel(BaseModel):
+def without_before_validators(schema: CoreSchema) -> CoreSchema:
+    """Returns a model core schema without the before validators wrapping its fields."""
+    if schema["type"] == "definitions":
+        return {**schema, "schema": without_before_validators(schema["schema"])}
+    fields = schema["schema"]
+    while fields["type"] == "function-before":
+        fields = fields["schema"]
+    return {**schema, "schema": fields}
+
+
+# Validators of documents read from the db per model, built on first load
+DB_VALIDATORS: Dict[type, SchemaValidator] = {}
+
+
+class AuthoredModel(BaseModel):
+    authorId: str
+    # NOTE: snapshot taken when the document was written, responses hydrate the current
+    # profile of authorId and only fall back to it
+    author: Union[AuthorModel, None] = None
+
+    @classmethod
+    def from_db(cls, data: dict):
+        """Builds instance from a document read from the db, validating it without the before validators, so no \
+            slug is generated. Documents embedding their author user go through every validator to split it."""
+        if data.get("authorId") is None:
+            return cls.model_validate(data)
+        validator = DB_VALIDATORS.get(cls)
+        if validator is None:
+            schema = without_before_validators(cls.__pydantic_core_schema__)
+            validator = DB_VALIDATORS[cls] = SchemaValidator(schema)
+        return validator.validate_python(data)
+
+    @root_validator(pre=True)
+    def split_embedded_author(cls, values):
+        # Documents written before authorId embed the whole author user
+        author = values.get("author")
+        if values.get("authorId") is None and isinstance(author, dict):
+            values["authorId"] = author.get("id")
+        return values
+
+
+class CommentModel(AuthoredModel):
     id: str = Field(default_factory=generate_id)
+    # NOTE: none for comments written before comments referenced their article
+    articleSlug: Union[str, None] = None
     body: str
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
-    author: UserModel
 
 
-class ArticleModel(BaseModel):
+class ArticleModel(AuthoredModel):
     slug: str
     # NOTE: slug is not a primary field because it could change and this would imply to
     # change all the references
     title: str
     description: str
-    body: str
+    # NOTE: none when loaded through the article list projection
+    body: Union[str, None] = None
     tagList: List[str] = Field(default_factory=list)
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
-    author: UserModel
     favoritedUserIDs: Tuple[str, ...] = ()
+    # NOTE: maintained next to favoritedUserIDs by the favorite sub-document mutations
+    favoritesCount: int = 0
     commentIDs: Tuple[str, ...] = ()
 
     @root_validator(pre=True)
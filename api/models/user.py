@@ -13,3 +13,22 @@ class UserModel(BaseModel):
     bio: Union[str, None] = None
     image: Union[str, None] = None
     followingIds: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, data: dict) -> "UserModel":
+        """Builds user instance from a document read from the db. The model has no Python validators to skip, \
+            so it is validated, which is faster than model_construct."""
+        return cls.model_validate(data)
+
+
+class AuthorModel(BaseModel):
+    """Public profile fields of a user, stored as a snapshot on the articles and comments they author"""
+
+    username: str
+    bio: Union[str, None] = None
+    image: Union[str, None] = None
+
+    @classmethod
+    def from_db(cls, data: dict) -> "AuthorModel":
+        """Builds author instance from a document read from the db, validated as users are."""
+        return cls.model_validate(data)
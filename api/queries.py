@@ -0,0 +1,320 @@
+"""Registry of every SQL++ statement the API runs.
+
+Statements are parameterised and executed by name through `CouchbaseClient.execute`
+as prepared statements, so the query service reuses their plans. Executions are
+timed per name by the db operation metrics.
+"""
+
+from typing import Dict
+
+# Keyset conditions continuing after the last returned row. The leading range on
+# createdAt keeps them sargable for an index on (createdAt, slug), the disjunction
+# breaks timestamp ties.
+CURSOR_CONDITION = (
+    "article.createdAt>=$cursorCreatedAt "
+    "AND (article.createdAt>$cursorCreatedAt OR article.slug>$cursorSlug)"
+)
+CURSOR_CONDITION_DESC = (
+    "article.createdAt<=$cursorCreatedAt "
+    "AND (article.createdAt<$cursorCreatedAt OR article.slug<$cursorSlug)"
+)
+
+# Conditions of the article list filters, "all" has none
+ARTICLE_FILTER_CONDITIONS = {
+    "author": "article.authorId=$authorId",
+    "favorited": "ANY f IN article.favoritedUserIDs SATISFIES f=$favoritedId END",
+    "tag": "ANY t IN article.tagList SATISFIES t=$tag END",
+    "all": None,
+}
+# Condition of unfiltered article lists. An index is only selected with a predicate on
+# its leading key, this one lets the createdAt index serve them.
+ARTICLE_LIST_ALL_CONDITION = "article.createdAt IS NOT MISSING"
+
+# Fields rendered by article lists, the projection leaves out body and commentIDs
+ARTICLE_LIST_FIELDS = (
+    "slug",
+    "title",
+    "description",
+    "tagList",
+    "createdAt",
+    "updatedAt",
+    "authorId",
+    "author",
+    "favoritedUserIDs",
+)
+ARTICLE_LIST_PROJECTION = ", ".join(f"article.{f}" for f in ARTICLE_LIST_FIELDS)
+
+
+class NamedQuery(object):
+    """SQL++ statement registered under a unique name"""
+
+    def __init__(self, name: str, statement: str, full_scan: bool = False):
+        self.name = name
+        self.statement = statement
+        # Statements meant to read the whole collection are skipped by the index audit
+        self.full_scan = full_scan
+        # Concurrent executions of read-only statements with the same parameters coalesce
+        self.read_only = statement.lstrip().upper().startswith("SELECT")
+
+    def __repr__(self) -> str:
+        return f"NamedQuery({self.name!r})"
+
+
+QUERIES: Dict[str, NamedQuery] = {}
+
+
+def register_query(name: str, statement: str, full_scan: bool = False) -> NamedQuery:
+    """Registers statement under name and returns the named query."""
+    if name in QUERIES:
+        raise ValueError(f"Query '{name}' is already registered")
+    QUERIES[name] = NamedQuery(name, statement, full_scan)
+    return QUERIES[name]
+
+
+def _where(*conditions) -> str:
+    conditions = [c for c in conditions if c]
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _article_lists(name: str, statement: str) -> Dict[bool, NamedQuery]:
+    """Registers an article list statement selecting list fields and one selecting whole documents, keyed by \
+        whether rows include the body."""
+    return {
+        False: register_query(name, statement.format(select=ARTICLE_LIST_PROJECTION)),
+        True: register_query(f"{name}.with_body", statement.format(select="article.*")),
+    }
+
+
+# Articles
+
+ARTICLE_BY_SLUG = register_query(
+    "article.by_slug",
+    """
+    SELECT META(article).id AS docKey, article AS doc
+    FROM article
+    WHERE article.slug=$slug
+    ORDER BY article.createdAt
+    LIMIT 1;
+    """,
+)
+
+# Article lists are keyed by filter, then by whether rows include the body
+ARTICLE_LIST_QUERIES = {
+    filter_type: _article_lists(
+        f"article.list.{filter_type}",
+        f"""
+        SELECT {{select}}
+        FROM article
+        {_where(condition or ARTICLE_LIST_ALL_CONDITION)}
+        ORDER BY article.createdAt
+        LIMIT $limit
+        OFFSET $offset;
+        """,
+    )
+    for filter_type, condition in ARTICLE_FILTER_CONDITIONS.items()
+}
+
+ARTICLE_LIST_CURSOR_QUERIES = {
+    filter_type: _article_lists(
+        f"article.list.{filter_type}.cursor",
+        f"""
+        SELECT {{select}}
+        FROM article
+        {_where(condition or ARTICLE_LIST_ALL_CONDITION, CURSOR_CONDITION)}
+        ORDER BY article.createdAt, article.slug
+        LIMIT $limit;
+        """,
+    )
+    for filter_type, condition in ARTICLE_FILTER_CONDITIONS.items()
+}
+
+ARTICLE_COUNT_QUERIES = {
+    filter_type: register_query(
+        f"article.count.{filter_type}",
+        f"""
+        SELECT RAW COUNT(*)
+        FROM article
+        {_where(condition)};
+        """,
+        # The unfiltered count is answered from the collection's document count
+        full_scan=condition is None,
+    )
+    for filter_type, condition in ARTICLE_FILTER_CONDITIONS.items()
+}
+
+FEED_LIST = _article_lists(
+    "article.feed",
+    """
+    SELECT {select}
+    FROM article
+    WHERE article.authorId IN $users_followed
+    ORDER BY article.createdAt DESC, article.slug DESC
+    LIMIT $limit
+    OFFSET $offset;
+    """,
+)
+
+FEED_LIST_CURSOR = _article_lists(
+    "article.feed.cursor",
+    f"""
+    SELECT {{select}}
+    FROM article
+    WHERE article.authorId IN $users_followed
+    AND {CURSOR_CONDITION_DESC}
+    ORDER BY article.createdAt DESC, article.slug DESC
+    LIMIT $limit;
+    """,
+)
+
+FEED_COUNT = register_query(
+    "article.feed.count",
+    """
+    SELECT RAW COUNT(*)
+    FROM article
+    WHERE article.authorId IN $users_followed;
+    """,
+)
+
+FEED_RECENT_ENTRIES = register_query(
+    "article.feed.recent_entries",
+    """
+    SELECT article.slug, article.authorId, article.createdAt
+    FROM article
+    WHERE article.authorId IN $author_ids
+    ORDER BY article.createdAt DESC, article.slug DESC
+    LIMIT $limit;
+    """,
+)
+
+ARTICLE_BACKFILL_FAVORITE_COUNTS = register_query(
+    "article.backfill_favorite_counts",
+    """
+    UPDATE article
+    SET article.favoritesCount=ARRAY_LENGTH(
+        IFMISSINGORNULL(article.favoritedUserIDs, [])
+    );
+    """,
+    full_scan=True,
+)
+
+# Rewrites documents written before authorId, which embed the whole author user, to the
+# author's ID and a profile snapshot
+_MIGRATE_EMBEDDED_AUTHORS = """
+    UPDATE {collection}
+    SET {collection}.authorId={collection}.author.id
+    UNSET {collection}.author.id,
+        {collection}.author.email,
+        {collection}.author.hashed_password,
+        {collection}.author.followingIds
+    WHERE {collection}.authorId IS MISSING
+    RETURNING RAW META({collection}).id;
+    """
+
+ARTICLE_MIGRATE_AUTHORS = register_query(
+    "article.migrate_authors",
+    _MIGRATE_EMBEDDED_AUTHORS.format(collection="article"),
+    full_scan=True,
+)
+
+# Tags
+
+TAG_COUNTS = register_query(
+    "tag.counts",
+    """
+    SELECT tag, COUNT(*) AS count
+    FROM article
+    UNNEST ARRAY_DISTINCT(article.tagList) AS tag
+    GROUP BY tag;
+    """,
+    full_scan=True,
+)
+
+# Comments
+
+# Comments of an article, oldest first, the cursor continues after (createdAt, id)
+COMMENT_LIST = register_query(
+    "comment.list",
+    """
+    SELECT comment.*
+    FROM comment
+    WHERE comment.articleSlug=$slug
+    ORDER BY comment.createdAt, comment.id
+    LIMIT $limit;
+    """,
+)
+
+COMMENT_LIST_CURSOR = register_query(
+    "comment.list.cursor",
+    """
+    SELECT comment.*
+    FROM comment
+    WHERE comment.articleSlug=$slug
+    AND comment.createdAt>=$cursorCreatedAt
+    AND (comment.createdAt>$cursorCreatedAt OR comment.id>$cursorId)
+    ORDER BY comment.createdAt, comment.id
+    LIMIT $limit;
+    """,
+)
+
+# Comment IDs of an article in index order, deleted in batches by the article cleanup
+COMMENT_IDS_BY_ARTICLE = register_query(
+    "comment.ids_by_article",
+    """
+    SELECT comment.id, comment.createdAt
+    FROM comment
+    WHERE comment.articleSlug=$slug
+    AND comment.createdAt>=$cursorCreatedAt
+    AND (comment.createdAt>$cursorCreatedAt OR comment.id>$cursorId)
+    ORDER BY comment.createdAt, comment.id
+    LIMIT $limit;
+    """,
+)
+
+ARTICLE_COMMENT_IDS = register_query(
+    "article.comment_ids",
+    """
+    SELECT article.slug, article.commentIDs
+    FROM article
+    WHERE ARRAY_LENGTH(article.commentIDs) > 0;
+    """,
+    full_scan=True,
+)
+
+COMMENT_MIGRATE_AUTHORS = register_query(
+    "comment.migrate_authors",
+    _MIGRATE_EMBEDDED_AUTHORS.format(collection="comment"),
+    full_scan=True,
+)
+
+# Users
+
+USER_BY_USERNAME = register_query(
+    "user.by_username",
+    """
+    SELECT `user`.* FROM `user` WHERE `user`.username=$value;
+    """,
+)
+
+USER_BY_EMAIL = register_query(
+    "user.by_email",
+    """
+    SELECT `user`.* FROM `user` WHERE `user`.email=$value;
+    """,
+)
+
+USER_FOLLOWER_IDS = register_query(
+    "user.follower_ids",
+    """
+    SELECT RAW `user`.id
+    FROM `user`
+    WHERE ANY f IN `user`.followingIds SATISFIES f=$author_id END;
+    """,
+)
+
+USER_LOOKUP_FIELDS = register_query(
+    "user.lookup_fields",
+    """
+    SELECT `user`.id, `user`.username, `user`.email FROM `user`;
+    """,
+    full_scan=True,
+)
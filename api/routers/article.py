@@ -1,21 +1,51 @@
+import asyncio
 from datetime import datetime
 from typing import Union
 
+import couchbase.subdocument as SD
 from couchbase.exceptions import DocumentExistsException
-from fastapi import APIRouter, Body, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status
 
-from ..core.article import query_articles_by_slug
-from ..core.exceptions import NotArticleAuthorException
+from ..core.article import (
+    ARTICLE_COLLECTION,
+    add_article_favorite,
+    count_articles,
+    invalidate_article_counts,
+    invalidate_cached_article,
+    on_article_document,
+    query_articles_by_slug,
+    remove_article_favorite,
+)
+from ..core.cleanup import ARTICLE_CLEANUP, enqueue_article_cleanup
+from ..core.exceptions import (
+    ArticleNotFoundException,
+    NotArticleAuthorException,
+    ServiceBusyException,
+    UserNotFoundException,
+)
+from ..core.feed import fan_out_article, get_timeline_articles
+from ..core.tag import update_tag_counts
+from ..core.user import get_author_profiles, get_user_by_username
 from ..database import get_db
-from ..models.article import ArticleModel, CommentModel
-from ..models.user import UserModel
+from ..settings import SETTINGS
+from ..models.article import ArticleModel
+from ..models.user import AuthorModel, UserModel
 from ..schemas.article import (
     ArticleResponseSchema,
     CreateArticleSchema,
     MultipleArticlesResponseSchema,
     UpdateArticleSchema,
 )
+from ..queries import (
+    ARTICLE_COUNT_QUERIES,
+    ARTICLE_LIST_CURSOR_QUERIES,
+    ARTICLE_LIST_QUERIES,
+    FEED_COUNT,
+    FEED_LIST,
+    FEED_LIST_CURSOR,
+)
+from ..utils.pagination import decode_cursor, first_page_limit, next_cursor
+from ..utils.responses import SchemaORJSONResponse
 from ..utils.security import (
     get_current_user_instance,
     get_current_user_optional_instance,
@@ -27,43 +57,22 @@ router = APIRouter(
     tags=["articles"],
     responses={404: {"description": "Not found"}},
 )
-ARTICLE_COLLECTION = "article"
-COMMENT_COLLECTION = "comment"
 
 
-async def build_query(filter_type: str, limit: int, offset: int) -> str:
-    """Builds SQL++ queries based on filter type and returns filter."""
-    base_query = f"""SELECT article.*
-        FROM article
-        ORDER BY article.createdAt
-        LIMIT {limit}
-        OFFSET {offset};
-    """
+async def get_filter_params(
+    filter_type: str,
+    author_id: Union[str, None] = None,
+    favorited_id: Union[str, None] = None,
+    tag: Union[str, None] = None,
+) -> dict:
+    """Returns named parameters of the article list and count queries of a filter."""
     if filter_type == "author":
-        return f"""SELECT article.*
-            FROM article
-            WHERE article.author.username=$author
-            ORDER BY article.createdAt
-            LIMIT {limit}
-            OFFSET {offset};
-        """
+        return {"authorId": author_id}
     elif filter_type == "favorited":
-        return f"""SELECT article.*
-            FROM article
-            WHERE $favoritedId IN article.favoritedUserIDs
-            ORDER BY article.createdAt
-            LIMIT {limit}
-            OFFSET {offset};
-        """
+        return {"favoritedId": favorited_id}
     elif filter_type == "tag":
-        return f"""SELECT article.*
-            FROM article
-            WHERE $tag IN article.tagList
-            ORDER BY article.createdAt
-            LIMIT {limit}
-            OFFSET {offset};
-        """
-    return base_query
+        return {"tag": tag}
+    return {}
 
 
 async def get_article_filter_type(
@@ -88,22 +97,14 @@ async def get_favorited_id(db, favorited: Union[str, None] = None):
     return favorited_user.id if favorited_user else None
 
 
-async def get_comments_by_ids(db, comment_ids):
-    if not comment_ids:
-        return []
-    query = f"""
-        SELECT comment.*
-        FROM {COMMENT_COLLECTION} AS comment
-        WHERE comment.id IN $comment_ids;
-    """
+async def get_author_id(db, author: Union[str, None] = None):
+    """Gets ID of the author by username and returns it, or none if there is no such user."""
+    if author is None:
+        return None
     try:
-        query_result = db.query(query, comment_ids=comment_ids)
-        return [CommentModel(**r) for r in query_result]
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to retrieve comments: {e}",
-        )
+        return (await get_user_by_username(db, author)).id
+    except UserNotFoundException:
+        return None
 
 
 @router.get("/articles", response_model=MultipleArticlesResponseSchema)
@@ -113,28 +114,48 @@ async def get_articles(
     tag: Union[str, None] = None,
     limit: int = 20,
     offset: int = 0,
+    cursor: Union[str, None] = None,
     user_instance: Union[UserModel, None] = Depends(get_current_user_optional_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instances by author, favorited or tag with a limit and offset and returns multiple \
-        articles schema."""
+    """Queries db for article instances by author, favorited or tag with a limit and either an offset or a cursor \
+        and returns multiple articles schema."""
     favorited_id = await get_favorited_id(db, favorited)
+    author_id = await get_author_id(db, author)
     filter_type = await get_article_filter_type(author, favorited, tag)
-    query = await build_query(filter_type, limit, offset)
-    if query is None:
-        return MultipleArticlesResponseSchema(articles=[], articles_count=0)
+    filter_params = await get_filter_params(filter_type, author_id, favorited_id, tag)
+    include_body = SETTINGS.ARTICLE_LIST_INCLUDE_BODY
+    if cursor is None:
+        query = ARTICLE_LIST_QUERIES[filter_type][include_body]
+        page_params = {"limit": first_page_limit(limit, offset), "offset": offset}
+    else:
+        query = ARTICLE_LIST_CURSOR_QUERIES[filter_type][include_body]
+        cursor_created_at, cursor_slug = decode_cursor(cursor)
+        page_params = {
+            "limit": limit + 1,
+            "cursorCreatedAt": cursor_created_at,
+            "cursorSlug": cursor_slug,
+        }
+    count_cache_key = (filter_type, *filter_params.values())
     try:
-        queryResult = db.query(
-            query,
-            author=author,
-            favoritedId=favorited_id,
-            tag=tag,
-            limit=limit,
-            offset=offset,
+        queryResult, articles_count = await asyncio.gather(
+            db.execute(query, **filter_params, **page_params),
+            count_articles(
+                db, ARTICLE_COUNT_QUERIES[filter_type], count_cache_key, **filter_params
+            ),
         )
-        article_list = [ArticleModel(**r) for r in queryResult]
-        return MultipleArticlesResponseSchema.from_article_instances(
-            article_list, len(article_list), user_instance
+        rows = [r for r in queryResult]
+        article_list = [ArticleModel.from_db(r) for r in rows[:limit]]
+        authors = await get_author_profiles(db, article_list)
+        return SchemaORJSONResponse(
+            MultipleArticlesResponseSchema.from_article_instances(
+                article_list,
+                articles_count,
+                user_instance,
+                next_cursor=next_cursor(rows, limit),
+                include_body=include_body,
+                authors=authors,
+            )
         )
     except TimeoutError:
         raise HTTPException(
@@ -151,28 +172,57 @@ async def get_articles(
 async def get_feed_articles(
     limit: int = 20,
     offset: int = 0,
+    cursor: Union[str, None] = None,
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Query db for article instances by author (that current user follows) and returns multiple articles schema."""
-    query = """
-            SELECT article.*
-            FROM article
-            WHERE article.author.id IN $users_followed
-            ORDER BY article.createdAt
-            LIMIT $limit
-            OFFSET $offset;
-        """
+    """Gets article instances by author (that current user follows), newest first, with a limit and either an offset \
+        or a cursor from the user's timeline or the db and returns multiple articles schema."""
+    include_body = SETTINGS.ARTICLE_LIST_INCLUDE_BODY
+    if cursor is None:
+        query = FEED_LIST[include_body]
+        page_params = {"limit": first_page_limit(limit, offset), "offset": offset}
+    else:
+        query = FEED_LIST_CURSOR[include_body]
+        cursor_created_at, cursor_slug = decode_cursor(cursor)
+        page_params = {
+            "limit": limit + 1,
+            "cursorCreatedAt": cursor_created_at,
+            "cursorSlug": cursor_slug,
+        }
+
+    async def get_page() -> list:
+        if cursor is None:
+            timeline_articles = await get_timeline_articles(
+                db, user_instance, page_params["limit"], offset, include_body
+            )
+            if timeline_articles is not None:
+                return timeline_articles
+        return await db.execute(
+            query, users_followed=user_instance.followingIds, **page_params
+        )
+
     try:
-        queryResult = db.query(
-            query,
-            users_followed=user_instance.followingIds,
-            limit=limit,
-            offset=offset,
+        rows, articles_count = await asyncio.gather(
+            get_page(),
+            count_articles(
+                db,
+                FEED_COUNT,
+                ("feed", user_instance.id),
+                users_followed=user_instance.followingIds,
+            ),
         )
-        article_list = [ArticleModel(**article) for article in queryResult]
-        return MultipleArticlesResponseSchema(
-            articles=article_list, articlesCount=len(article_list)
+        article_list = [ArticleModel.from_db(article) for article in rows[:limit]]
+        authors = await get_author_profiles(db, article_list)
+        return SchemaORJSONResponse(
+            MultipleArticlesResponseSchema.from_article_instances(
+                article_list,
+                articles_count,
+                user_instance,
+                next_cursor=next_cursor(rows, limit),
+                include_body=include_body,
+                authors=authors,
+            )
         )
     except TimeoutError:
         raise HTTPException(
@@ -187,21 +237,31 @@ async def get_feed_articles(
 
 @router.post("/articles", response_model=ArticleResponseSchema)
 async def create_article(
+    background_tasks: BackgroundTasks,
     article: CreateArticleSchema = Body(..., embed=True),
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Create article instance from create schema, inserts instance to db then returns article schema."""
-    response_article = ArticleModel(author=user_instance, **article.model_dump())
+    """Create article instance from create schema, inserts instance to db, fans it out to followers' timelines after \
+        responding then returns article schema."""
+    response_article = ArticleModel(
+        authorId=user_instance.id,
+        author=AuthorModel(**user_instance.model_dump()),
+        **article.model_dump(),
+    )
     response_article.tagList.sort()
+    article_data = response_article.model_dump(mode="json")
     try:
-        db.insert_document(
-            ARTICLE_COLLECTION,
-            response_article.slug,
-            jsonable_encoder(response_article),
+        await db.insert_document(
+            ARTICLE_COLLECTION, response_article.slug, article_data
         )
-        return ArticleResponseSchema.from_article_instance(
-            response_article, user_instance
+        background_tasks.add_task(fan_out_article, db, article_data)
+        await update_tag_counts(db, added=response_article.tagList)
+        invalidate_article_counts()
+        return SchemaORJSONResponse(
+            ArticleResponseSchema.from_article_instance(
+                response_article, user_instance
+            )
         )
     except DocumentExistsException:
         raise HTTPException(
@@ -224,9 +284,14 @@ async def get_single_article(
     user_instance: Union[UserModel, None] = Depends(get_current_user_optional_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug and returns article schema."""
+    """Queries db for article instance by slug, gets the profile of its author and returns article schema."""
     article_model = await query_articles_by_slug(slug, db)
-    return ArticleResponseSchema.from_article_instance(article_model, user_instance)
+    authors = await get_author_profiles(db, [article_model])
+    return SchemaORJSONResponse(
+        ArticleResponseSchema.from_article_instance(
+            article_model, user_instance, authors.get(article_model.authorId)
+        )
+    )
 
 
 @router.put("/articles/{slug}", response_model=ArticleResponseSchema)
@@ -236,23 +301,38 @@ async def update_article(
     current_user: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug, updates instance with update schema, upserts article to db and \
-        returns article schema."""
+    """Queries db for article instance by slug, updates instance with update schema, writes the changed fields to \
+        db with a sub-document mutation and returns article schema."""
     article_instance = await query_articles_by_slug(slug, db)
-    if current_user != article_instance.author:
+    if current_user.id != article_instance.authorId:
         raise NotArticleAuthorException()
+    previous_tags = list(article_instance.tagList)
     patch_dict = article.model_dump(exclude_none=True)
     for name, value in patch_dict.items():
         setattr(article_instance, name, value)
     article_instance.updatedAt = datetime.utcnow()
+    # NOTE: only patched fields are written so concurrent favorites are not overwritten
+    patch_dict["updatedAt"] = article_instance.updatedAt
+    specs = [
+        SD.upsert(name, value)
+        for name, value in article_instance.model_dump(
+            mode="json", include=set(patch_dict)
+        ).items()
+    ]
     try:
-        db.upsert_document(
-            ARTICLE_COLLECTION,
-            article_instance.slug,
-            jsonable_encoder((article_instance)),
+        await on_article_document(
+            db, slug, lambda key: db.mutate_in(ARTICLE_COLLECTION, key, specs)
+        )
+        invalidate_cached_article(slug)
+        await update_tag_counts(
+            db, added=article_instance.tagList, removed=previous_tags
         )
-        return ArticleResponseSchema.from_article_instance(
-            article_instance, current_user
+        return SchemaORJSONResponse(
+            ArticleResponseSchema.from_article_instance(
+                article_instance,
+                current_user,
+                AuthorModel(**current_user.model_dump()),
+            )
         )
     except TimeoutError:
         raise HTTPException(
@@ -271,14 +351,21 @@ async def favorite_article(
     current_user: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug, adds user ID to favoritedUserIDs, upserts instance to db and returns \
-        article schema."""
-    article = await query_articles_by_slug(slug, db)
-    favorited_set = {*article.favoritedUserIDs, current_user.id}
-    article.favoritedUserIDs = tuple(favorited_set)
+    """Adds user ID to favoritedUserIDs of article by slug with a sub-document mutation, gets article instance and \
+        returns article schema."""
     try:
-        db.upsert_document(ARTICLE_COLLECTION, article.slug, jsonable_encoder(article))
-        return ArticleResponseSchema.from_article_instance(article, current_user)
+        await add_article_favorite(db, slug, current_user.id)
+        invalidate_cached_article(slug)
+        invalidate_article_counts(("favorited", current_user.id))
+        article = await query_articles_by_slug(slug, db)
+        authors = await get_author_profiles(db, [article])
+        return SchemaORJSONResponse(
+            ArticleResponseSchema.from_article_instance(
+                article, current_user, authors.get(article.authorId)
+            )
+        )
+    except ArticleNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -296,14 +383,21 @@ async def unfavorite_article(
     current_user: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug, removes user ID from favoritedUserIDs, upserts instance to db and \
-        returns article schema."""
-    article = await query_articles_by_slug(slug, db)
-    favorited_set = {*article.favoritedUserIDs} - {current_user.id}
-    article.favoritedUserIDs = tuple(favorited_set)
+    """Removes user ID from favoritedUserIDs of article by slug with a sub-document mutation, gets article instance \
+        and returns article schema."""
     try:
-        db.upsert_document(ARTICLE_COLLECTION, article.slug, jsonable_encoder(article))
-        return ArticleResponseSchema.from_article_instance(article, current_user)
+        await remove_article_favorite(db, slug, current_user.id)
+        invalidate_cached_article(slug)
+        invalidate_article_counts(("favorited", current_user.id))
+        article = await query_articles_by_slug(slug, db)
+        authors = await get_author_profiles(db, [article])
+        return SchemaORJSONResponse(
+            ArticleResponseSchema.from_article_instance(
+                article, current_user, authors.get(article.authorId)
+            )
+        )
+    except ArticleNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -321,12 +415,20 @@ async def delete_article(
     current_user: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug and deletes instance from db."""
+    """Queries db for article instance by slug, deletes instance from db and queues the cleanup of its comments, \
+        tag counts and timeline entries."""
     article = await query_articles_by_slug(slug, db)
-    if current_user.id != article.author.id:
+    if current_user.id != article.authorId:
         raise NotArticleAuthorException()
+    if ARTICLE_CLEANUP.full():
+        raise ServiceBusyException()
     try:
-        db.delete_document(ARTICLE_COLLECTION, article.slug)
+        await on_article_document(
+            db, article.slug, lambda key: db.delete_document(ARTICLE_COLLECTION, key)
+        )
+        invalidate_cached_article(article.slug)
+        invalidate_article_counts()
+        enqueue_article_cleanup(db, article)
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Body, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
+import asyncio
+from typing import Union
 
-from ..core.article import query_articles_by_slug
-from ..core.exceptions import CommentNotFoundException
-from ..core.user import query_users_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+
+from ..core.article import get_article_document
+from ..core.comment import add_comment, delete_comment
+from ..core.exceptions import (
+    ArticleNotFoundException,
+    CommentNotFoundException,
+    NotCommentAuthorException,
+)
+from ..core.user import get_author_profiles
 from ..database import get_db
 from ..models.article import CommentModel
-from ..models.user import UserModel
-from ..routers.article import ARTICLE_COLLECTION, COMMENT_COLLECTION
+from ..models.user import AuthorModel, UserModel
+from ..queries import COMMENT_LIST, COMMENT_LIST_CURSOR
 from ..schemas.comment import (
     CommentSchema,
     CreateCommentSchema,
     MultipleCommentsResponseSchema,
     SingleCommentResponseSchema,
 )
-from ..schemas.user import ProfileSchema
-from ..utils.security import get_current_user_instance
+from ..settings import SETTINGS
+from ..utils.pagination import decode_cursor, next_cursor
+from ..utils.responses import SchemaORJSONResponse
+from ..utils.security import (
+    get_current_user_instance,
+    get_current_user_optional_instance,
+)
 
 router = APIRouter(
     prefix="/api",
@@ -32,28 +44,23 @@ async def add_article_comment(
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug, creates comment instance from create schema, adds comment instance \
-        to article instance, upserts article instance and returns comment schema."""
-    article = await query_articles_by_slug(slug, db)
-    comment_instance = CommentModel(author=user_instance, **comment.model_dump())
+    """Creates comment instance from create schema, inserts it to db while appending its ID to the article by slug \
+        with a sub-document mutation and returns comment schema."""
+    comment_instance = CommentModel(
+        authorId=user_instance.id,
+        author=AuthorModel(**user_instance.model_dump()),
+        articleSlug=slug,
+        **comment.model_dump(),
+    )
     try:
-        db.insert_document(
-            COMMENT_COLLECTION,
-            comment_instance.id,
-            jsonable_encoder(comment_instance)
-        )
-        article.commentIDs = article.commentIDs + (comment_instance.id,)
-        db.upsert_document(
-            ARTICLE_COLLECTION,
-            article.slug,
-            jsonable_encoder(article)
-        )
-        comment_instance.author = ProfileSchema(**user_instance.model_dump())
-        return SingleCommentResponseSchema(
-            comment=CommentSchema(
-                **comment_instance.model_dump(),
+        await add_comment(db, slug, comment_instance)
+        return SchemaORJSONResponse(
+            SingleCommentResponseSchema.model_construct(
+                comment=CommentSchema.from_comment_instance(comment_instance)
             )
         )
+    except ArticleNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -66,26 +73,43 @@ async def add_article_comment(
 
 
 @router.get("/articles/{slug}/comments", response_model=MultipleCommentsResponseSchema)
-async def get_article_comments(slug: str, db=Depends(get_db)):
-    """Queries db for article instance by slug, queries db for user instances by id of article comments, creates \
-        comment schemas and returns multiple comments schema."""
-    article = await query_articles_by_slug(slug, db)
-    comment_ids = article.commentIDs
-    if not comment_ids:
-        return MultipleCommentsResponseSchema(comments=[])
-    
-    query = """
-            SELECT comment.*
-            FROM comment
-            WHERE comment.id IN $comment_ids;
-        """
+async def get_article_comments(
+    slug: str,
+    limit: Union[int, None] = Query(None, ge=1, le=SETTINGS.COMMENT_PAGE_MAX_SIZE),
+    cursor: Union[str, None] = None,
+    user_instance: Union[UserModel, None] = Depends(get_current_user_optional_instance),
+    db=Depends(get_db),
+):
+    """Queries db for a page of the comments of article by slug, oldest first, with a limit and a cursor, gets the \
+        profiles of their authors, creates comment schemas and returns multiple comments schema."""
+    if limit is None:
+        limit = SETTINGS.COMMENT_PAGE_SIZE
+    if cursor is None:
+        query = COMMENT_LIST
+        page_params = {"limit": limit + 1}
+    else:
+        query = COMMENT_LIST_CURSOR
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        page_params = {
+            "limit": limit + 1,
+            "cursorCreatedAt": cursor_created_at,
+            "cursorId": cursor_id,
+        }
     try:
-        queryResult = db.query(query, comment_ids=comment_ids)
-        comments = [CommentModel(**r) for r in queryResult]
-        data = [
-            (comment, await query_users_db(db, id=comment.author.id)) for comment in comments
-        ]
-        return MultipleCommentsResponseSchema.from_comments_and_authors(data)
+        _, rows = await asyncio.gather(
+            get_article_document(slug, db),
+            db.execute(query, slug=slug, **page_params),
+        )
+        comments = [CommentModel.from_db(r) for r in rows[:limit]]
+        authors = await get_author_profiles(db, comments)
+        data = [(comment, authors.get(comment.authorId)) for comment in comments]
+        return SchemaORJSONResponse(
+            MultipleCommentsResponseSchema.from_comments_and_authors(
+                data, user_instance, next_cursor(rows, limit, key="id")
+            )
+        )
+    except ArticleNotFoundException:
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -104,18 +128,16 @@ async def delete_article_comment(
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for article instance by slug, identifies comment by comment ID and user ID, removes comment from \
-        article instance and upserts article instance to db."""
+    """Checks that comment by ID belongs to article by slug and was written by current user, then deletes it from db \
+        while removing its ID from the article with a sub-document mutation."""
     try:
-        article = await query_articles_by_slug(slug, db)
-        if id in article.commentIDs:
-            article.commentIDs = [cid for cid in article.commentIDs if cid != id]
-            db.delete_document(COMMENT_COLLECTION, id)
-            db.upsert_document(
-                ARTICLE_COLLECTION, article.slug, jsonable_encoder(article)
-            )
-        else:
-            raise CommentNotFoundException()
+        await delete_comment(db, slug, id, user_instance.id)
+    except (
+        ArticleNotFoundException,
+        CommentNotFoundException,
+        NotCommentAuthorException,
+    ):
+        raise
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
@@ -2,7 +2,9 @@ from typing import Union
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from ..core.user import query_users_db
+from ..core.article import invalidate_article_counts
+from ..core.feed import add_author_to_timeline, remove_author_from_timeline
+from ..core.user import add_following_id, query_users_db, remove_following_id
 from ..database import get_db
 from ..models.user import UserModel
 from ..schemas.user import ProfileResponseSchema, ProfileSchema
@@ -10,7 +12,6 @@ from ..utils.security import (
     get_current_user_instance,
     get_current_user_optional_instance,
 )
-from .user import USER_COLLECTION
 
 router = APIRouter(
     prefix="/api",
@@ -39,15 +40,13 @@ async def follow_user(
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for user instance by username, adds current user ID to instance's followingIds, upserts instance \
-        to db and returns profile schema."""
+    """Queries db for user instance by username, adds its ID to current user's followingIds with a sub-document \
+        mutation and returns profile schema."""
     user_to_follow = await query_users_db(db, username=username)
-    following_set = set(user_instance.followingIds) | set((user_to_follow.id,))
-    user_instance.followingIds = tuple(following_set)
     try:
-        db.upsert_document(
-            USER_COLLECTION, user_instance.id, user_instance.model_dump()
-        )
+        await add_following_id(db, user_instance.id, user_to_follow.id)
+        invalidate_article_counts(("feed", user_instance.id))
+        await add_author_to_timeline(db, user_instance.id, user_to_follow.id)
         return ProfileResponseSchema(
             profile=ProfileSchema(following=True, **user_to_follow.model_dump())
         )
@@ -68,15 +67,13 @@ async def unfollow_user(
     user_instance: UserModel = Depends(get_current_user_instance),
     db=Depends(get_db),
 ):
-    """Queries db for user instance by username, removes current user ID from instance's followingIds, upserts \
-        instance to db and returns profile schema."""
+    """Queries db for user instance by username, removes its ID from current user's followingIds with a \
+        sub-document mutation and returns profile schema."""
     user_to_unfollow = await query_users_db(db, username=username)
-    following_set = set(user_instance.followingIds) - set((user_to_unfollow.id,))
-    user_instance.followingIds = tuple(following_set)
     try:
-        db.upsert_document(
-            USER_COLLECTION, user_instance.id, user_instance.model_dump()
-        )
+        await remove_following_id(db, user_instance.id, user_to_unfollow.id)
+        invalidate_article_counts(("feed", user_instance.id))
+        await remove_author_from_timeline(db, user_instance.id, user_to_unfollow.id)
         return ProfileResponseSchema(
             profile=ProfileSchema(following=False, **user_to_unfollow.model_dump())
         )
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from ..core.tag import get_popular_tags
 from ..database import get_db
 from ..schemas.tag import TagsResponseSchema
 
@@ -12,20 +13,9 @@ router = APIRouter(
 
 @router.get("/tags", response_model=TagsResponseSchema)
 async def get_tags(db=Depends(get_db)):
-    """Queries db for tags and returns tags schema."""
-    query = """
-        SELECT article.tagList
-        FROM article as article;
-    """
+    """Gets tag counts document from db and returns tags schema ordered by popularity."""
     try:
-        queryResult = db.query(query)
-        result_list = [r for r in queryResult]
-        if len(result_list) > 0:
-            return TagsResponseSchema(
-                tags=[tags for tagList in result_list for tags in tagList["tagList"]]
-            )
-        else:
-            return TagsResponseSchema(tags=[])
+        return TagsResponseSchema(tags=await get_popular_tags(db))
     except TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Request timeout"
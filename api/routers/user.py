@@ -2,6 +2,13 @@ from couchbase.exceptions import DocumentExistsException
 from fastapi import APIRouter, Body, Depends, HTTPException, status
 
 from ..core.exceptions import InvalidCredentialsException
+from ..core.user import (
+    USER_COLLECTION,
+    claim_user_lookups,
+    release_user_lookups,
+    update_user_document,
+    user_lookup_keys,
+)
 from ..database import get_db
 from ..models.user import UserModel
 from ..schemas.user import (
@@ -25,19 +32,27 @@ router = APIRouter(
     tags=["users"],
     responses={404: {"description": "Not found"}},
 )
-USER_COLLECTION = "user"
 
 
 @router.post("/users", response_model=UserResponseSchema)
 async def register(
     user: RegistrationSchema = Body(..., embed=True), db=Depends(get_db)
 ):
-    """Creates a user instance with registration data, then inserts instance to db and returns user schema."""
+    """Creates a user instance with registration data, claims its username and email lookup documents, then inserts \
+        instance to db and returns user schema."""
     user_model = UserModel(
-        **user.model_dump(), hashed_password=get_password_hash(user.password)
+        **user.model_dump(), hashed_password=await get_password_hash(user.password)
     )
+    lookup_keys = user_lookup_keys(user_model)
     try:
-        db.insert_document(USER_COLLECTION, user_model.id, user_model.model_dump())
+        await claim_user_lookups(db, user_model.id, lookup_keys)
+        try:
+            await db.insert_document(
+                USER_COLLECTION, user_model.id, user_model.model_dump()
+            )
+        except Exception:
+            await release_user_lookups(db, user_model.id, lookup_keys)
+            raise
         token = await create_access_token(user_model)
         return UserResponseSchema(
             user=UserSchema(token=token, **user_model.model_dump())
@@ -63,7 +78,7 @@ async def login_user(
 ):
     """Authenticates user with login data, creates a token and returns user schema."""
     user = await authenticate_user(user.email, user.password.get_secret_value(), db)
-    if user is None:
+    if not user:
         raise InvalidCredentialsException()
     token = await create_access_token(user)
     return UserResponseSchema(user=UserSchema(token=token, **user.model_dump()))
@@ -82,17 +97,23 @@ async def update_user(
     token: str = Depends(OAUTH2_SCHEME),
     db=Depends(get_db),
 ):
-    """Queries db for current user instance by token, updates it with update schema, upserts instance to db and \
-        returns user schema."""
-    patch_dict = user.model_dump(exclude_unset=True)
-    for name, value in patch_dict.items():
-        setattr(user_instance, name, value)
+    """Updates the stored current user with update schema through a fresh read and a CAS guarded replace, moving its \
+        lookup documents if username or email changed, and returns user schema."""
+    patch_dict = user.model_dump(exclude_unset=True, exclude={"token"})
+    patch = {
+        name: value
+        for name, value in patch_dict.items()
+        if value is not None or name not in ("username", "email")
+    }
     try:
-        db.upsert_document(
-            USER_COLLECTION, user_instance.id, user_instance.model_dump()
-        )
+        updated_user = await update_user_document(db, user_instance.id, patch)
         return UserResponseSchema(
-            user=UserSchema(token=token, **user_instance.model_dump())
+            user=UserSchema(token=token, **updated_user.model_dump())
+        )
+    except DocumentExistsException:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username or email already taken",
         )
     except TimeoutError:
         raise HTTPException(
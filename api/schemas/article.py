@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import List, Union
+from typing import ClassVar, Dict, List, Tuple, Union
 
 from ..models.article import ArticleModel
-from ..models.user import UserModel
+from ..models.user import AuthorModel, UserModel
 from .base import BaseSchema
 from .user import ProfileSchema
 
@@ -20,11 +20,10 @@ class UpdateArticleSchema(BaseSchema):
     body: Union[str, None] = None
 
 
-class ArticleSchema(BaseSchema):
+class ArticleListItemSchema(BaseSchema):
     slug: str
     title: str
     description: str
-    body: str
     tagList: List[str]
     createdAt: datetime
     updatedAt: datetime
@@ -32,37 +31,76 @@ class ArticleSchema(BaseSchema):
     favoritesCount: int = 0
     author: ProfileSchema
 
+    # Fields copied as they are from the article instance
+    ARTICLE_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "slug",
+        "title",
+        "description",
+        "tagList",
+        "createdAt",
+        "updatedAt",
+    )
+
     @classmethod
     def from_article_instance(
-        cls, article: ArticleModel, user: Union[UserModel, None] = None
-    ) -> "ArticleSchema":
+        cls,
+        article: ArticleModel,
+        user: Union[UserModel, None] = None,
+        author: Union[AuthorModel, None] = None,
+    ) -> "ArticleListItemSchema":
         if user is None:
             favorited = False
+            following = False
         else:
             favorited = user.id in article.favoritedUserIDs
+            following = article.authorId in user.followingIds
+        author = author or article.author
 
-        return cls(
+        # NOTE: constructed without validation, the article instance already is valid
+        return cls.model_construct(
             favorited=favorited,
             favoritesCount=len(article.favoritedUserIDs),
-            **article.model_dump()
+            author=ProfileSchema.model_construct(
+                following=following,
+                username=author.username,
+                bio=author.bio,
+                image=author.image,
+            ),
+            **{name: getattr(article, name) for name in cls.ARTICLE_FIELDS},
         )
 
 
+class ArticleSchema(ArticleListItemSchema):
+    body: str
+
+    ARTICLE_FIELDS: ClassVar[Tuple[str, ...]] = (
+        *ArticleListItemSchema.ARTICLE_FIELDS,
+        "body",
+    )
+
+
 class ArticleResponseSchema(BaseSchema):
     article: ArticleSchema
 
     @classmethod
     def from_article_instance(
-        cls, article: ArticleModel, user: Union[UserModel, None] = None
+        cls,
+        article: ArticleModel,
+        user: Union[UserModel, None] = None,
+        author: Union[AuthorModel, None] = None,
     ) -> "ArticleResponseSchema":
-        return cls(
-            article=ArticleSchema.from_article_instance(article=article, user=user)
+        return cls.model_construct(
+            article=ArticleSchema.from_article_instance(
+                article=article, user=user, author=author
+            )
         )
 
 
 class MultipleArticlesResponseSchema(BaseSchema):
-    articles: List[ArticleSchema]
+    articles: List[Union[ArticleSchema, ArticleListItemSchema]]
     articlesCount: int = 0
+    # Opaque keyset cursor for the next page, only set when paginating with a cursor
+    nextCursor: Union[str, None] = None
 
     @classmethod
     def from_article_instances(
@@ -70,6 +108,16 @@ class MultipleArticlesResponseSchema(BaseSchema):
         articles: List[ArticleModel],
         total_count: int,
         user: Union[UserModel, None] = None,
+        next_cursor: Union[str, None] = None,
+        include_body: bool = False,
+        authors: Union[Dict[str, AuthorModel], None] = None,
     ) -> "MultipleArticlesResponseSchema":
-        articles = [ArticleSchema.from_article_instance(a, user) for a in articles]
-        return cls(articles=articles, articlesCount=total_count)
+        schema = ArticleSchema if include_body else ArticleListItemSchema
+        authors = authors or {}
+        articles = [
+            schema.from_article_instance(a, user, authors.get(a.authorId))
+            for a in articles
+        ]
+        return cls.model_construct(
+            articles=articles, articlesCount=total_count, nextCursor=next_cursor
+        )
@@ -2,12 +2,15 @@ from datetime import datetime
 
 from pydantic.main import BaseModel
 
+# Format of datetimes in API responses
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
 
 class BaseSchema(BaseModel):
     model_config = {
         "populate_by_name": True,
         "json_encoders": {
-            datetime: lambda d: d.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            datetime: lambda d: d.strftime(DATETIME_FORMAT),
         },
         "from_attributes": True,
     }
@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 from ..models.article import CommentModel
-from ..models.user import UserModel
+from ..models.user import AuthorModel, UserModel
 from ..schemas.user import ProfileSchema
 from .base import BaseSchema
 
@@ -14,6 +14,29 @@ class CommentSchema(BaseSchema):
     body: str
     author: ProfileSchema
 
+    @classmethod
+    def from_comment_instance(
+        cls,
+        comment: CommentModel,
+        author: Union[AuthorModel, None] = None,
+        user: Union[UserModel, None] = None,
+    ) -> "CommentSchema":
+        following = user is not None and comment.authorId in user.followingIds
+        author = author or comment.author
+        # NOTE: constructed without validation, the comment instance already is valid
+        return cls.model_construct(
+            id=comment.id,
+            createdAt=comment.createdAt,
+            updatedAt=comment.updatedAt,
+            body=comment.body,
+            author=ProfileSchema.model_construct(
+                following=following,
+                username=author.username,
+                bio=author.bio,
+                image=author.image,
+            ),
+        )
+
 
 class SingleCommentResponseSchema(BaseSchema):
     comment: CommentSchema
@@ -21,13 +44,22 @@ class SingleCommentResponseSchema(BaseSchema):
 
 class MultipleCommentsResponseSchema(BaseSchema):
     comments: List[CommentSchema]
+    # Opaque keyset cursor for the next page, only set when there are more comments
+    nextCursor: Union[str, None] = None
 
     @classmethod
-    def from_comments_and_authors(cls, data: List[Tuple[CommentModel, UserModel]]):
-        return cls(
+    def from_comments_and_authors(
+        cls,
+        data: List[Tuple[CommentModel, AuthorModel]],
+        user: Union[UserModel, None] = None,
+        next_cursor: Union[str, None] = None,
+    ):
+        return cls.model_construct(
             comments=[
-                {**comment.model_dump(), "author": author} for comment, author in data
-            ]
+                CommentSchema.from_comment_instance(comment, author, user)
+                for comment, author in data
+            ],
+            nextCursor=next_cursor,
         )
 
 
@@ -1,4 +1,5 @@
 import os
+from typing import Union
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -11,6 +12,39 @@ class _Settings(BaseSettings):
     SECRET_KEY: SecretStr = Field(os.getenv("JWT_SECRET"))
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    PROFILE_CACHE_MAX_SIZE: int = 4096
+    PROFILE_CACHE_TTL_SECONDS: int = 60
+    # Disable once `python -m api.cli backfill-user-lookups` has run
+    USER_LOOKUP_QUERY_FALLBACK: bool = True
+    # Directory of the sockets broadcasting cache invalidations between the workers of
+    # one host, unset with a single worker
+    CACHE_INVALIDATION_DIR: Union[str, None] = None
+    ARTICLE_CACHE_MAX_SIZE: int = 1024
+    ARTICLE_CACHE_TTL_SECONDS: int = 30
+    ARTICLE_COUNT_CACHE_MAX_SIZE: int = 1024
+    ARTICLE_COUNT_CACHE_TTL_SECONDS: int = 10
+    COMMENT_PAGE_SIZE: int = 50
+    COMMENT_PAGE_MAX_SIZE: int = 200
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    FEED_TIMELINES_ENABLED: bool = False
+    FEED_TIMELINE_MAX_SIZE: int = 200
+    FEED_FANOUT_MAX_FOLLOWERS: int = 1000
+    # Cleanup of deleted articles runs on background workers, each deleting or
+    # updating at most ARTICLE_CLEANUP_BATCH_SIZE documents at a time
+    ARTICLE_CLEANUP_WORKERS: int = 2
+    ARTICLE_CLEANUP_QUEUE_LIMIT: int = 1024
+    ARTICLE_CLEANUP_BATCH_SIZE: int = 50
+    # Requests slower than SLOW_REQUEST_SECONDS or making more db calls than
+    # REQUEST_DB_CALL_BUDGET are logged with a summary of their db calls
+    SLOW_REQUEST_SECONDS: float = 1.0
+    REQUEST_DB_CALL_BUDGET: int = 20
+    # Adds a Server-Timing header with db, auth and serialization time to responses
+    SERVER_TIMING_ENABLED: bool = False
+    # Compatibility for clients rendering bodies from the article list endpoints
+    ARTICLE_LIST_INCLUDE_BODY: bool = False
 
 
 # Make this a singleton to avoid reloading it from the env everytime
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from api.utils.cache import TTLCache
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_cache_expires_entries():
+    cache = TTLCache(max_size=2, ttl_seconds=10)
+    with patch("api.utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("api.utils.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_invalidate():
+    cache = TTLCache(max_size=4, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_cache_counts_hits_and_misses():
+    cache = TTLCache(max_size=4, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hitRate"] == 0.5
+
+
+def test_values_read_before_an_invalidation_are_not_stored():
+    cache = TTLCache(max_size=4, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set_if_current("a", "stale", generation)
+    cache.set_if_current("b", 2, generation)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.set_if_current("a", "fresh", cache.generation())
+    assert cache.get("a") == "fresh"
+
+
+def test_values_read_before_clearing_are_not_stored():
+    cache = TTLCache(max_size=4, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate()
+    cache.set_if_current("a", "stale", generation)
+
+    assert cache.get("a") is None
+
+
+def test_forgotten_invalidations_still_reject_older_reads():
+    cache = TTLCache(max_size=1, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.invalidate("b")
+    cache.set_if_current("a", "stale", generation)
+
+    assert cache.get("a") is None
@@ -0,0 +1,49 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from api.core.feed import PROLIFIC_AUTHORS_KEY, get_timeline_articles
+from api.models.user import UserModel
+from api.settings import SETTINGS
+
+
+class FakeResult(object):
+    def __init__(self, content: dict):
+        self.content_as = {dict: content}
+
+
+def entries(author_id, days):
+    return [
+        {
+            "slug": f"{author_id}-{day}",
+            "authorId": author_id,
+            "createdAt": f"2024-05-{day}",
+        }
+        for day in days
+    ]
+
+
+def test_timeline_page_past_timeline_size_with_prolific_authors():
+    user = UserModel(
+        username="jake",
+        email="jake@jake.jake",
+        hashed_password="hash",
+        followingIds=("author-id", "prolific-id"),
+    )
+    documents = {
+        user.id: {"entries": entries("author-id", (13, 12, 11))},
+        PROLIFIC_AUTHORS_KEY: {"ids": ["prolific-id"]},
+    }
+    prolific_entries = entries("prolific-id", (24, 23, 22, 21))
+    db = AsyncMock()
+    db.get_document = AsyncMock(side_effect=lambda _, key: FakeResult(documents[key]))
+    db.execute = AsyncMock(
+        side_effect=lambda query, **params: prolific_entries[: params["limit"]]
+    )
+    list_fields = AsyncMock(side_effect=lambda db, slug: {"slug": slug})
+
+    with patch.object(SETTINGS, "FEED_TIMELINES_ENABLED", True), patch.object(
+        SETTINGS, "FEED_TIMELINE_MAX_SIZE", 4
+    ), patch("api.core.feed.get_article_list_fields", list_fields):
+        page = asyncio.run(get_timeline_articles(db, user, limit=2, offset=4))
+
+    assert page == [{"slug": "author-id-13"}, {"slug": "author-id-12"}]
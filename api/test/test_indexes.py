@@ -0,0 +1,36 @@
+from api.indexes import IndexDefinition, audit_queries
+from api.queries import QUERIES, register_query
+
+
+def test_every_registered_query_has_an_index():
+    assert audit_queries() == []
+
+
+def test_audit_reports_unindexed_query():
+    register_query(
+        "test.unindexed", "SELECT comment.* FROM comment WHERE comment.body=$body;"
+    )
+    try:
+        assert audit_queries() == ["test.unindexed"]
+    finally:
+        del QUERIES["test.unindexed"]
+
+
+def test_audit_requires_a_predicate_on_the_leading_key():
+    register_query(
+        "test.ordered", "SELECT article.* FROM article ORDER BY article.createdAt;"
+    )
+    try:
+        assert audit_queries() == ["test.ordered"]
+    finally:
+        del QUERIES["test.ordered"]
+
+
+def test_array_index_leading_key():
+    index = IndexDefinition(
+        "idx_article_tags", "article", ["DISTINCT ARRAY t FOR t IN tagList END"]
+    )
+
+    assert index.leading_key == ("array", "tagList")
+    assert "IF NOT EXISTS" in index.create_statement()
+    assert '"defer_build": true' in index.create_statement()
@@ -0,0 +1,53 @@
+import asyncio
+from unittest.mock import patch
+
+from api.utils.cache import CACHES, TTLCache
+from api.utils.invalidation import InvalidationChannel, decode_key
+
+
+def test_decode_key_restores_tuples():
+    assert decode_key(["feed", "user-id"]) == ("feed", "user-id")
+    assert decode_key("slug") == "slug"
+    assert decode_key(None) is None
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    cache = TTLCache(max_size=4, ttl_seconds=60, name="test.invalidation")
+    cache.set(("feed", "user-id"), 1)
+    cache.set("slug", 2)
+
+    async def broadcast():
+        sender = InvalidationChannel(str(tmp_path), "sender")
+        receiver = InvalidationChannel(str(tmp_path), "receiver")
+        sender.start()
+        receiver.start()
+        try:
+            sender.publish("test.invalidation", ("feed", "user-id"))
+            await asyncio.sleep(0.05)
+        finally:
+            sender.stop()
+            receiver.stop()
+
+    try:
+        asyncio.run(broadcast())
+        assert cache.get(("feed", "user-id")) is None
+        assert cache.get("slug") == 2
+        assert list(tmp_path.iterdir()) == []
+    finally:
+        del CACHES["test.invalidation"]
+
+
+def test_unnamed_channel_is_named_by_the_worker_that_starts_it(tmp_path):
+    # Created at import, before the server forks its workers
+    with patch("os.getpid", return_value=1):
+        channel = InvalidationChannel(str(tmp_path))
+
+    async def start():
+        with patch("os.getpid", return_value=2):
+            channel.start()
+        try:
+            return channel.path
+        finally:
+            channel.stop()
+
+    assert asyncio.run(start()) == str(tmp_path / "2.sock")
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from api.utils.metrics import (
+    METRICS,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    format_labels,
+    render_metrics,
+)
+
+
+@pytest.fixture
+def histogram():
+    histogram = Histogram("test_seconds", "Test latency.", ("name",), (0.1, 1.0))
+    yield histogram
+    del METRICS["test_seconds"]
+
+
+def test_histogram_renders_cumulative_buckets(histogram):
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, name="a")
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{name="a",le="0.1"} 1',
+        'test_seconds_bucket{name="a",le="1.0"} 3',
+        'test_seconds_bucket{name="a",le="+Inf"} 4',
+        'test_seconds_count{name="a"} 4',
+        'test_seconds_sum{name="a"} 6.05',
+    ]
+
+
+def test_label_values_are_escaped():
+    assert format_labels([("name", 'a"b\\c\n')]) == '{name="a\\"b\\\\c\\n"}'
+    assert format_labels([]) == ""
+
+
+def test_metric_names_are_unique(histogram):
+    with pytest.raises(ValueError):
+        Counter("test_seconds", "Duplicate.")
+
+
+def test_render_metrics_includes_registered_metrics(histogram):
+    histogram.observe(0.2, name="b")
+
+    rendered = render_metrics()
+    assert 'test_seconds_count{name="b"} 1\n' in rendered
+    assert "# TYPE conduit_db_operation_duration_seconds histogram" in rendered
+    assert "# TYPE conduit_cache_hits_total counter" in rendered
+
+
+def test_middleware_records_requests_by_route_template():
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/api/articles/{slug}")
+        await send({"type": "http.response.start", "status": 404})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/api/articles/missing"}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+
+    assert (
+        "conduit_http_request_duration_seconds_count"
+        '{method="GET",route="/api/articles/{slug}",status="404"} 1'
+    ) in REQUEST_SECONDS.render()
+    assert "conduit_http_requests_in_flight 0" in REQUESTS_IN_FLIGHT.render()
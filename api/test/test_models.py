@@ -0,0 +1,62 @@
+from api.models.article import ArticleModel, CommentModel
+
+
+def test_legacy_embedded_author_is_split_into_author_id_and_snapshot():
+    legacy_author = {
+        "id": "user-id",
+        "username": "jake",
+        "email": "jake@jake.jake",
+        "hashed_password": "hash",
+        "bio": "I work at statefarm",
+        "image": None,
+        "followingIds": ["other-id"],
+    }
+
+    article = ArticleModel(
+        title="How to train your dragon",
+        description="Ever wonder how?",
+        body="You have to believe",
+        author=legacy_author,
+    )
+    comment = CommentModel(body="Thank you so much!", author=legacy_author)
+
+    for document in (article, comment):
+        assert document.authorId == "user-id"
+        assert document.author.model_dump() == {
+            "username": "jake",
+            "bio": "I work at statefarm",
+            "image": None,
+        }
+
+
+def test_from_db_matches_validated_article():
+    article = ArticleModel(
+        title="How to train your dragon",
+        description="Ever wonder how?",
+        body="You have to believe",
+        tagList=["dragons", "training"],
+        authorId="user-id",
+        author={"username": "jake"},
+        favoritedUserIDs=("other-id",),
+    )
+    row = article.model_dump(mode="json")
+
+    loaded = ArticleModel.from_db(row)
+
+    assert loaded == ArticleModel(**row)
+    assert loaded.slug == article.slug
+    assert loaded.createdAt == article.createdAt
+    assert loaded.favoritedUserIDs == ("other-id",)
+
+
+def test_from_db_splits_legacy_embedded_author():
+    row = CommentModel(body="Thank you so much!", authorId="user-id").model_dump(
+        mode="json"
+    )
+    row["authorId"] = None
+    row["author"] = {"id": "user-id", "username": "jake", "email": "jake@jake.jake"}
+
+    loaded = CommentModel.from_db(row)
+
+    assert loaded.authorId == "user-id"
+    assert loaded.author.username == "jake"
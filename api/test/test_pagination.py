@@ -0,0 +1,96 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from api.core.exceptions import InvalidCursorException
+from api.models.user import AuthorModel, UserModel
+from api.routers.article import get_articles, get_feed_articles
+from api.utils.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    sort_key = ("2024-05-01T10:00:00.123456", "hello-world-1a2b3c4d")
+
+    assert decode_cursor(encode_cursor(*sort_key)) == sort_key
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1, "slug")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_only_when_more_rows():
+    rows = [{"createdAt": f"2024-05-0{i}", "slug": f"article-{i}"} for i in (1, 2, 3)]
+
+    assert next_cursor(rows, 3) is None
+    assert decode_cursor(next_cursor(rows, 2)) == ("2024-05-02", "article-2")
+
+
+def test_next_cursor_of_comments_uses_id():
+    rows = [{"createdAt": "2024-05-01", "id": f"comment-{i}"} for i in (1, 2)]
+
+    assert decode_cursor(next_cursor(rows, 1, key="id")) == ("2024-05-01", "comment-1")
+
+
+
+def article_rows(count):
+    return [
+        {
+            "slug": f"article-{i}",
+            "title": "How to train your dragon",
+            "description": "Ever wonder how?",
+            "authorId": "author-id",
+            "createdAt": f"2024-05-{30 - i}T10:00:00",
+            "updatedAt": f"2024-05-{30 - i}T10:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def get_first_page(handler, rows, **kwargs):
+    """Calls an article list handler for a first page of 2 articles on a db holding rows and returns the fetch limit \
+        and the response body."""
+    db = AsyncMock()
+    db.execute = AsyncMock(side_effect=lambda query, **params: rows[: params["limit"]])
+    authors = {"author-id": AuthorModel(username="jake")}
+    with patch("api.routers.article.count_articles", AsyncMock(return_value=3)), patch(
+        "api.routers.article.get_author_profiles", AsyncMock(return_value=authors)
+    ):
+        response = asyncio.run(handler(limit=2, offset=0, cursor=None, db=db, **kwargs))
+    return db.execute.call_args.kwargs["limit"], json.loads(response.body)
+
+
+def test_first_article_list_page_returns_cursor_to_next_page():
+    limit, page = get_first_page(
+        get_articles,
+        article_rows(3),
+        author=None,
+        favorited=None,
+        tag=None,
+        user_instance=None,
+    )
+
+    assert limit == 3
+    assert [a["slug"] for a in page["articles"]] == ["article-0", "article-1"]
+    assert decode_cursor(page["nextCursor"]) == ("2024-05-29T10:00:00", "article-1")
+
+
+@pytest.mark.parametrize("count, has_next_page", [(3, True), (2, False)])
+def test_first_feed_page_returns_cursor_only_with_next_page(count, has_next_page):
+    user = UserModel(
+        username="jake",
+        email="jake@jake.jake",
+        hashed_password="hash",
+        followingIds=("author-id",),
+    )
+
+    limit, page = get_first_page(
+        get_feed_articles, article_rows(count), user_instance=user
+    )
+
+    assert limit == 3
+    assert len(page["articles"]) == 2
+    assert (page["nextCursor"] is not None) == has_next_page
@@ -0,0 +1,32 @@
+import re
+
+import pytest
+
+from api.queries import (
+    ARTICLE_LIST_CURSOR_QUERIES,
+    ARTICLE_LIST_QUERIES,
+    FEED_LIST,
+    FEED_LIST_CURSOR,
+    QUERIES,
+    register_query,
+)
+
+
+def test_statements_are_parameterised():
+    for query in QUERIES.values():
+        for value in re.findall(r"\b(?:LIMIT|OFFSET)\s+([^\s;]+)", query.statement):
+            assert value.startswith("$") or value == "1", query.name
+        assert "{" not in query.statement, query.name
+
+
+def test_register_query_rejects_duplicate_names():
+    with pytest.raises(ValueError):
+        register_query("article.by_slug", "SELECT 1;")
+
+
+def test_article_lists_select_body_only_when_asked():
+    lists = [*ARTICLE_LIST_QUERIES.values(), *ARTICLE_LIST_CURSOR_QUERIES.values()]
+    for queries in [*lists, FEED_LIST, FEED_LIST_CURSOR]:
+        assert "article.*" not in queries[False].statement, queries[False].name
+        assert "article.body" not in queries[False].statement, queries[False].name
+        assert "article.*" in queries[True].statement, queries[True].name
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from api.utils.singleflight import SINGLEFLIGHTS, SingleFlight, freeze
+
+
+@pytest.fixture
+def flight():
+    flight = SingleFlight("test.flight")
+    yield flight
+    del SINGLEFLIGHTS["test.flight"]
+
+
+def test_concurrent_calls_with_the_same_key_share_one_call(flight):
+    calls = []
+
+    async def read(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return [key]
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", lambda: read("a")),
+            flight.do("a", lambda: read("a")),
+            flight.do("b", lambda: read("b")),
+        )
+
+    assert asyncio.run(run()) == [["a"], ["a"], ["b"]]
+    assert calls == ["a", "b"]
+    assert flight.stats() == {"calls": 2, "collapsed": 1, "inFlight": 0}
+
+
+def test_errors_are_shared(flight):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+        )
+
+    assert [type(r) for r in asyncio.run(run())] == [ValueError, ValueError]
+    assert flight.stats()["calls"] == 1
+
+
+def test_freeze_makes_parameters_hashable():
+    params = {"users_followed": ["b", "a"], "limit": 20}
+
+    assert freeze(params) == (("limit", 20), ("users_followed", ("b", "a")))
+    hash(freeze(params))
+
+
+def test_calls_after_forget_start_a_new_call(flight):
+    calls = []
+
+    async def read(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        before = asyncio.ensure_future(flight.do("a", lambda: read("before")))
+        await asyncio.sleep(0)
+        flight.forget("a")
+        after = await flight.do("a", lambda: read("after"))
+        return await before, after
+
+    assert asyncio.run(run()) == ("before", "after")
+    assert calls == ["before", "after"]
+    assert flight.stats() == {"calls": 2, "collapsed": 0, "inFlight": 0}
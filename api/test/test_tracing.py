@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from api.utils.tracing import (
+    REQUEST_TRACE,
+    TracingMiddleware,
+    params_shape,
+    trace_db_call,
+    trace_phase,
+)
+
+
+def run_request(app, **options):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = TracingMiddleware(
+        app,
+        slow_seconds=options.get("slow_seconds", 10.0),
+        db_call_budget=options.get("db_call_budget", 2),
+        server_timing=options.get("server_timing", False),
+    )
+    scope = {"type": "http", "method": "GET", "path": "/api/articles/a/comments"}
+    asyncio.run(middleware(scope, None, send))
+    return messages
+
+
+async def comments_app(scope, receive, send):
+    with trace_phase("auth"):
+        trace_db_call("get", "user", 0.001)
+    for _ in range(3):
+        trace_db_call("query", "comment.list", 0.002, {"slug": "a", "limit": 50}, 2)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+
+def test_params_shape_leaves_out_values():
+    shape = params_shape({"slug": "secret", "ids": ["a", "b"]})
+    assert shape == "{slug:str, ids:list[2]}"
+    assert params_shape(None) == ""
+
+
+def test_calls_outside_requests_are_not_traced():
+    trace_db_call("get", "article", 0.001)
+
+    assert REQUEST_TRACE.get() is None
+
+
+def test_requests_over_the_db_call_budget_are_logged(caplog):
+    with caplog.at_level(logging.WARNING):
+        run_request(comments_app)
+
+    assert "GET /api/articles/a/comments" in caplog.text
+    assert "4 db calls" in caplog.text
+    assert "3x query comment.list{slug:str, limit:int} 6.0ms 6 rows" in caplog.text
+
+
+def test_requests_within_budget_are_not_logged(caplog):
+    with caplog.at_level(logging.WARNING):
+        run_request(comments_app, db_call_budget=4)
+
+    assert caplog.text == ""
+
+
+def test_server_timing_header_breaks_down_phases():
+    messages = run_request(comments_app, db_call_budget=4, server_timing=True)
+
+    headers = dict(messages[0]["headers"])
+    timing = headers[b"server-timing"].decode()
+    assert "auth;dur=" in timing
+    assert "db;dur=7.0" in timing
+    assert "total;dur=" in timing
+    assert b"server-timing" not in dict(run_request(comments_app)[0]["headers"])
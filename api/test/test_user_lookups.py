@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from couchbase.exceptions import (
+    CasMismatchException,
+    DocumentExistsException,
+    DocumentNotFoundException,
+)
+from fastapi import HTTPException
+
+from api.core.user import (
+    LOOKUP_COLLECTION,
+    USER_COLLECTION,
+    release_user_lookup,
+    update_user_document,
+)
+from api.models.user import UserModel
+from api.routers.user import register
+from api.schemas.user import RegistrationSchema
+
+
+class FakeResult(object):
+    def __init__(self, content: dict, cas: int):
+        self.content_as = {dict: content}
+        self.cas = cas
+
+
+def fake_kv(documents: dict):
+    """Returns a db whose KV operations read and write documents, keyed by collection and key, with CAS checks."""
+    cas = {key: 1 for key in documents}
+
+    async def get_document(collection, key):
+        if (collection, key) not in documents:
+            raise DocumentNotFoundException()
+        return FakeResult(documents[collection, key], cas[collection, key])
+
+    async def insert_document(collection, key, doc):
+        if (collection, key) in documents:
+            raise DocumentExistsException()
+        documents[collection, key] = doc
+        cas[collection, key] = 1
+
+    def check_cas(collection, key, options):
+        if (collection, key) not in documents:
+            raise DocumentNotFoundException()
+        if options.get("cas") not in (None, cas[collection, key]):
+            raise CasMismatchException()
+
+    async def replace_document(collection, key, doc, options):
+        check_cas(collection, key, options)
+        documents[collection, key] = doc
+        cas[collection, key] += 1
+
+    async def delete_document(collection, key, options):
+        check_cas(collection, key, options)
+        del documents[collection, key]
+
+    db = AsyncMock()
+    db.get_document = AsyncMock(side_effect=get_document)
+    db.insert_document = AsyncMock(side_effect=insert_document)
+    db.replace_document = AsyncMock(side_effect=replace_document)
+    db.delete_document = AsyncMock(side_effect=delete_document)
+    return db
+
+
+def test_register_with_taken_username_conflicts():
+    documents = {(LOOKUP_COLLECTION, "username::jake"): {"userId": "other-id"}}
+    db = fake_kv(documents)
+    registration = RegistrationSchema(
+        username="jake", email="jake@jake.jake", password="jakejake"
+    )
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(register(user=registration, db=db))
+
+    assert error.value.status_code == 409
+    # The email lookup claimed alongside is released and no user is written
+    assert documents == {
+        (LOOKUP_COLLECTION, "username::jake"): {"userId": "other-id"}
+    }
+
+
+def test_rename_moves_username_and_email_lookups():
+    user = UserModel(username="jake", email="jake@jake.jake", hashed_password="hash")
+    documents = {
+        (USER_COLLECTION, user.id): user.model_dump(),
+        (LOOKUP_COLLECTION, "username::jake"): {"userId": user.id},
+        (LOOKUP_COLLECTION, "email::jake@jake.jake"): {"userId": user.id},
+    }
+
+    updated = asyncio.run(
+        update_user_document(
+            fake_kv(documents),
+            user.id,
+            {"username": "jacob", "email": "Jacob@Jake.jake"},
+        )
+    )
+
+    assert updated.username == "jacob"
+    assert documents[USER_COLLECTION, user.id]["username"] == "jacob"
+    lookup_keys = {key for (collection, key) in documents if collection == "lookup"}
+    assert lookup_keys == {"username::jacob", "email::jacob@jake.jake"}
+    assert documents[LOOKUP_COLLECTION, "username::jacob"] == {"userId": user.id}
+
+
+def test_release_skips_lookup_claimed_by_another_user():
+    documents = {(LOOKUP_COLLECTION, "username::jake"): {"userId": "other-id"}}
+    db = fake_kv(documents)
+
+    asyncio.run(release_user_lookup(db, "user-id", "username::jake"))
+
+    db.delete_document.assert_not_called()
+    assert documents == {
+        (LOOKUP_COLLECTION, "username::jake"): {"userId": "other-id"}
+    }
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from api.core.exceptions import ServiceBusyException
+from api.utils.workers import JobQueue
+
+
+def test_jobs_run_in_the_background_after_failures():
+    done = []
+
+    async def job(value):
+        if value == "fail":
+            raise ValueError("boom")
+        done.append(value)
+
+    async def run():
+        queue = JobQueue(workers=1, max_queued=4, name="test.jobs")
+        queue.start()
+        for value in ("a", "fail", "b"):
+            queue.enqueue(lambda value=value: job(value))
+        await queue.queue.join()
+        await queue.stop()
+
+    asyncio.run(run())
+    assert done == ["a", "b"]
+
+
+def test_enqueue_rejects_jobs_when_full_or_stopped():
+    async def block():
+        await asyncio.sleep(1)
+
+    async def run():
+        queue = JobQueue(workers=1, max_queued=1, name="test.jobs")
+        with pytest.raises(ServiceBusyException):
+            queue.enqueue(block)
+        queue.start()
+        queue.enqueue(block)
+        await asyncio.sleep(0)
+        queue.enqueue(block)
+        assert queue.full()
+        with pytest.raises(ServiceBusyException):
+            queue.enqueue(block)
+        await queue.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Union
+
+
+class TTLCache(object):
+    """In-process LRU cache whose entries expire after a fixed time to live."""
+
+    def __init__(
+        self, max_size: int, ttl_seconds: float, name: Union[str, None] = None
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Generation bumped by every invalidation, and the generation of the latest
+        # invalidation of recently invalidated keys. Older ones are folded into the
+        # floor, which is also used for keys never invalidated.
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._invalidated_floor = 0
+        if name is not None:
+            register_cache(name, self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns cached value for key, or default if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores value for key, evicting the least recently used entry when full."""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def generation(self) -> int:
+        """Returns the current generation, to be taken before reading a value from the db for set_if_current."""
+        return self._generation
+
+    def set_if_current(self, key: Hashable, value: Any, generation: int) -> None:
+        """Stores value for key unless key was invalidated after generation was taken, so a value read before a \
+        write is not cached after the write invalidated it."""
+        if self._invalidated_at.get(key, self._invalidated_floor) > generation:
+            return
+        self.set(key, value)
+
+    def invalidate(self, key: Union[Hashable, None] = None) -> None:
+        """Removes key from the cache, or every entry if no key is given, and bumps their generation."""
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+            self._invalidated_at.clear()
+            self._invalidated_floor = self._generation
+            return
+        self._entries.pop(key, None)
+        self._invalidated_at[key] = self._generation
+        self._invalidated_at.move_to_end(key)
+        while len(self._invalidated_at) > max(self.max_size, 1):
+            _, self._invalidated_floor = self._invalidated_at.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+CACHES: Dict[str, TTLCache] = {}
+
+
+def register_cache(name: str, cache: TTLCache) -> None:
+    """Registers cache under name for monitoring."""
+    if name in CACHES:
+        raise ValueError(f"Cache '{name}' is already registered")
+    CACHES[name] = cache
+
+
+def get_cache_stats() -> Dict[str, dict]:
+    """Returns size and hit/miss counters of every registered cache."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
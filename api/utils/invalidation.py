@@ -0,0 +1,107 @@
+"""Cache invalidation broadcast between the worker processes of one host.
+
+Every worker binds a Unix datagram socket in `SETTINGS.CACHE_INVALIDATION_DIR`. Write paths invalidate a named
+cache in their own worker and send the invalidation to the sockets of the other workers, which apply it to their
+cache of the same name.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from contextlib import suppress
+from typing import Any, Hashable, Union
+
+from ..settings import SETTINGS
+from .cache import CACHES, TTLCache
+
+SOCKET_SUFFIX = ".sock"
+MAX_MESSAGE_BYTES = 4096
+
+logger = logging.getLogger(__name__)
+
+
+def decode_key(key: Any) -> Hashable:
+    """Returns cache key decoded from JSON, with tuple keys restored from lists."""
+    if isinstance(key, list):
+        return tuple(decode_key(k) for k in key)
+    return key
+
+
+class InvalidationChannel(object):
+    """Unix datagram socket exchanging cache invalidations with the other workers"""
+
+    def __init__(self, directory: Union[str, None], name: Union[str, None] = None):
+        self.directory = directory
+        # Without a name the socket is named after the process id of the worker that
+        # starts it, servers fork workers after importing the app
+        self.name = name
+        self.path: Union[str, None] = None
+        self._socket: Union[socket.socket, None] = None
+
+    def start(self) -> None:
+        """Binds this worker's socket and applies received invalidations on the running event loop."""
+        if not self.directory or self._socket is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        name = self.name or str(os.getpid())
+        self.path = os.path.join(self.directory, f"{name}{SOCKET_SUFFIX}")
+        with suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._socket.bind(self.path)
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), self._receive)
+
+    def stop(self) -> None:
+        if self._socket is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        with suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                message = self._socket.recv(MAX_MESSAGE_BYTES)
+            except BlockingIOError:
+                return
+            try:
+                name, key = json.loads(message)
+            except ValueError:
+                logger.warning("Ignored malformed cache invalidation message")
+                continue
+            cache = CACHES.get(name)
+            if cache is not None:
+                cache.invalidate(decode_key(key))
+
+    def publish(self, name: str, key: Union[Hashable, None] = None) -> None:
+        """Sends invalidation of key, or of every entry, in the named cache to the other workers."""
+        if self._socket is None:
+            return
+        message = json.dumps([name, key]).encode()
+        for entry in os.listdir(self.directory):
+            path = os.path.join(self.directory, entry)
+            if path == self.path or not entry.endswith(SOCKET_SUFFIX):
+                continue
+            try:
+                self._socket.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that exited
+                with suppress(FileNotFoundError):
+                    os.unlink(path)
+            except BlockingIOError:
+                # The entry expires with the cache TTL in the busy worker
+                logger.warning(f"Dropped invalidation of cache '{name}' for {path}")
+
+
+INVALIDATION_CHANNEL = InvalidationChannel(SETTINGS.CACHE_INVALIDATION_DIR)
+
+
+def invalidate_cache(cache: TTLCache, key: Union[Hashable, None] = None) -> None:
+    """Removes key, or every entry, from a named cache in this worker and in the other workers."""
+    cache.invalidate(key)
+    INVALIDATION_CHANNEL.publish(cache.name, key)
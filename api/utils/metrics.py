@@ -0,0 +1,257 @@
+"""In-process metrics of the API, rendered in the Prometheus text format by `/metrics`.
+
+Request latencies are recorded per route template by `MetricsMiddleware` and db
+operation latencies per operation and collection or query name by `CouchbaseClient`.
+Cache and single flight counters are read from their registries at scrape time.
+"""
+
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from .cache import get_cache_stats
+from .singleflight import get_singleflight_stats
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """Returns labels as a Prometheus label set, empty without labels."""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+    return f"{{{pairs}}}"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(object):
+    """Metric whose samples are kept per combination of label values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        register_metric(self)
+
+    def label_values(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        """Returns samples as (name suffix, labels, value) tuples."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{format_labels(labels)} {format_value(value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self.label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return [
+            ("", list(zip(self.label_names, key)), value)
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+        # Per label values: observations per bucket, the last one above every bound,
+        # their count and their sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self.label_values(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+        bucket_counts = entry[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[i] += 1
+                break
+        else:
+            bucket_counts[-1] += 1
+        entry[1] += 1
+        entry[2] += value
+
+    def samples(self):
+        samples = []
+        for key, (bucket_counts, count, total) in self._values.items():
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", labels + [("le", repr(bound))], cumulative))
+            samples.append(("_bucket", labels + [("le", "+Inf")], count))
+            samples.append(("_count", labels, count))
+            samples.append(("_sum", labels, total))
+        return samples
+
+
+METRICS: Dict[str, Metric] = {}
+
+
+def register_metric(metric: Metric) -> None:
+    """Registers metric under its name for rendering."""
+    if metric.name in METRICS:
+        raise ValueError(f"Metric '{metric.name}' is already registered")
+    METRICS[metric.name] = metric
+
+
+REQUEST_SECONDS = Histogram(
+    "conduit_http_request_duration_seconds",
+    "Latency of HTTP requests by route template.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "conduit_http_requests_in_flight", "HTTP requests being handled."
+)
+DB_OPERATION_SECONDS = Histogram(
+    "conduit_db_operation_duration_seconds",
+    "Latency of Couchbase operations by operation and collection or query name.",
+    ("operation", "name"),
+)
+DB_OPERATION_ERRORS = Counter(
+    "conduit_db_operation_errors_total",
+    "Failed Couchbase operations by operation and collection or query name.",
+    ("operation", "name"),
+)
+
+
+def observe_db_operation(
+    operation: str, name: str, seconds: float, error: bool = False
+) -> None:
+    """Records a db operation on collection or query name that took seconds."""
+    DB_OPERATION_SECONDS.observe(seconds, operation=operation, name=name)
+    if error:
+        DB_OPERATION_ERRORS.inc(operation=operation, name=name)
+
+
+# Metrics read from the stats of every registered cache and single flight group, as
+# (name, type, stats field, help)
+CACHE_STATS = (
+    ("conduit_cache_hits_total", "counter", "hits", "Cache hits."),
+    ("conduit_cache_misses_total", "counter", "misses", "Cache misses."),
+    ("conduit_cache_entries", "gauge", "size", "Cached entries."),
+)
+SINGLEFLIGHT_STATS = (
+    ("conduit_singleflight_calls_total", "counter", "calls", "Calls started."),
+    (
+        "conduit_singleflight_collapsed_total",
+        "counter",
+        "collapsed",
+        "Calls that joined a call in flight.",
+    ),
+    ("conduit_singleflight_in_flight", "gauge", "inFlight", "Calls in flight."),
+)
+
+
+def render_stats(
+    stats: Dict[str, dict], label: str, fields: Sequence[Tuple[str, str, str, str]]
+) -> List[str]:
+    """Renders a metric per stats field with a sample per registered name."""
+    lines = []
+    for name, type, field, help in fields:
+        lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {type}"])
+        for key, values in stats.items():
+            labels = format_labels([(label, key)])
+            lines.append(f"{name}{labels} {format_value(values[field])}")
+    return lines
+
+
+def render_metrics() -> str:
+    """Returns every registered metric and the cache and single flight counters in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in METRICS.values():
+        lines.extend(metric.render())
+    lines.extend(render_stats(get_cache_stats(), "cache", CACHE_STATS))
+    lines.extend(render_stats(get_singleflight_stats(), "group", SINGLEFLIGHT_STATS))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware(object):
+    """ASGI middleware recording latency of HTTP requests by route template and counting requests in flight"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Set by the router on the scope, templates keep the label values bounded
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started_at,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -0,0 +1,37 @@
+import base64
+import json
+from typing import List, Tuple, Union
+
+from ..core.exceptions import InvalidCursorException
+
+
+def encode_cursor(created_at: str, slug: str) -> str:
+    """Encodes the sort key of the last returned article into an opaque cursor."""
+    payload = json.dumps([created_at, slug], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decodes an opaque cursor into the createdAt and slug of the last returned article."""
+    try:
+        created_at, slug = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise InvalidCursorException()
+    if not isinstance(created_at, str) or not isinstance(slug, str):
+        raise InvalidCursorException()
+    return created_at, slug
+
+
+def next_cursor(rows: List[dict], limit: int, key: str = "slug") -> Union[str, None]:
+    """Returns cursor after the last of limit rows, ordered by createdAt then key, if the query fetched one row more \
+        than limit, else none."""
+    if limit <= 0 or len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last["createdAt"], last[key])
+
+
+def first_page_limit(limit: int, offset: int) -> int:
+    """Returns number of rows to fetch for an offset page, one more than limit on the first page so next_cursor can \
+        tell whether to continue with a cursor."""
+    return limit + 1 if offset == 0 else limit
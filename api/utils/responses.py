@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from ..schemas.base import DATETIME_FORMAT
+from .tracing import trace_phase
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class SchemaORJSONResponse(JSONResponse):
+    """JSON response rendering a schema with orjson, formatting datetimes like BaseSchema.
+
+    Handlers return it with a schema built from validated models, so FastAPI neither validates the schema against
+    the response model again nor encodes it with jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with trace_phase("serialization"):
+            if isinstance(content, BaseModel):
+                content = content.model_dump()
+            return orjson.dumps(
+                content, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
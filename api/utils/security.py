@@ -12,11 +12,18 @@ from passlib.context import CryptContext
 from pydantic import BaseModel, ValidationError
 from starlette.requests import Request
 
-from ..core.exceptions import CredentialsException, NotAuthenticatedException
+from ..core.exceptions import (
+    CredentialsException,
+    NotAuthenticatedException,
+    UserNotFoundException,
+)
+from ..core.user import get_cached_user_by_id, get_user_by_email, get_user_by_username
 from ..database import get_db
 from ..models.user import UserModel
 from ..schemas.user import UserSchema
 from ..settings import SETTINGS
+from .tracing import trace_phase
+from .workers import BoundedExecutor
 
 
 class TokenModel(BaseModel):
@@ -26,10 +33,19 @@ class TokenModel(BaseModel):
 
 class TokenContentModel(BaseModel):
     username: str
+    # NOTE: tokens issued before the ID was added to the payload only carry the username
+    id: Union[str, None] = None
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL while hashing, so a thread pool keeps it off the event loop
+PASSWORD_HASHER = BoundedExecutor(
+    max_workers=SETTINGS.PASSWORD_HASH_WORKERS,
+    max_queued=SETTINGS.PASSWORD_HASH_QUEUE_LIMIT,
+    name="password-hash",
+)
+
 
 class OAuth2PasswordToken(OAuth2):
     def __init__(
@@ -57,12 +73,14 @@ OAUTH2_SCHEME = OAuth2PasswordToken(tokenUrl="/users")
 api = FastAPI()
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await PASSWORD_HASHER.run(
+        pwd_context.verify, plain_password, hashed_password
+    )
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await PASSWORD_HASHER.run(pwd_context.hash, password)
 
 
 async def get_user_instance(
@@ -70,37 +88,31 @@ async def get_user_instance(
     email: Union[str, None] = None,
     username: Union[str, None] = None,
 ):
-    """Queries db for user instance by email or username and returns user instance or none."""
-    if username is not None:
-        query = """
-            SELECT `user`.* FROM `user` WHERE `user`.username=$username;
-        """
-    elif email is not None:
-        query = """
-            SELECT `user`.* FROM `user` WHERE `user`.email=$email;
-        """
-    else:
-        return None
-    queryResult = db.query(query, email=email, username=username)
-    user_data = [r for r in queryResult]
-    if not user_data:
+    """Gets user instance by email or username through its lookup document and returns user instance or none."""
+    try:
+        if username is not None:
+            return await get_user_by_username(db, username)
+        elif email is not None:
+            return await get_user_by_email(db, email)
+        else:
+            return None
+    except UserNotFoundException:
         raise NotAuthenticatedException()
-    else:
-        return UserModel(**user_data[0])
 
 
 async def authenticate_user(email: str, password: str, db):
     """Queries db for user instance by email, compares password to instance's hashed password and returns user \
         instance if verified."""
-    user = await get_user_instance(db, email=email)
-    if not user or not verify_password(password, user.hashed_password):
-        return False
-    return user
+    with trace_phase("auth"):
+        user = await get_user_instance(db, email=email)
+        if not user or not await verify_password(password, user.hashed_password):
+            return False
+        return user
 
 
 async def create_access_token(user: UserModel) -> str:
-    """Create an access token based on the user's username."""
-    token_content = TokenContentModel(username=user.username)
+    """Create an access token based on the user's ID and username."""
+    token_content = TokenContentModel(username=user.username, id=user.id)
     expire = datetime.utcnow() + timedelta(minutes=SETTINGS.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"exp": expire, "sub": token_content.model_dump_json()}
     encoded_jwt = jwt.encode(
@@ -113,28 +125,34 @@ async def get_current_user_instance(
     db=Depends(get_db),
     token: Union[str, None] = Depends(OAUTH2_SCHEME),
 ) -> UserModel:
-    """Decode JWT, queries db for user instance by username and returns user instance."""
+    """Decode JWT, gets user instance by ID from the user cache or db and returns user instance."""
     if token is None:
         raise NotAuthenticatedException()
-    try:
-        payload = jwt.decode(
-            token,
-            SETTINGS.SECRET_KEY.get_secret_value(),
-            algorithms=[SETTINGS.ALGORITHM],
-        )
-    except ExpiredSignatureError:
-        raise CredentialsException()
-    except JWTError:
-        raise CredentialsException()
-    try:
-        payload_model = json.loads(payload.get("sub"))
-        token_content = TokenContentModel(**payload_model)
-    except ValidationError:
-        raise CredentialsException()
-    user = await get_user_instance(db, username=token_content.username)
-    if user is None:
-        raise CredentialsException()
-    return user
+    with trace_phase("auth"):
+        try:
+            payload = jwt.decode(
+                token,
+                SETTINGS.SECRET_KEY.get_secret_value(),
+                algorithms=[SETTINGS.ALGORITHM],
+            )
+        except ExpiredSignatureError:
+            raise CredentialsException()
+        except JWTError:
+            raise CredentialsException()
+        try:
+            payload_model = json.loads(payload.get("sub"))
+            token_content = TokenContentModel(**payload_model)
+        except ValidationError:
+            raise CredentialsException()
+        if token_content.id is not None:
+            try:
+                return await get_cached_user_by_id(db, token_content.id)
+            except UserNotFoundException:
+                raise CredentialsException()
+        user = await get_user_instance(db, username=token_content.username)
+        if user is None:
+            raise CredentialsException()
+        return user
 
 
 async def get_current_user_optional_instance(
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def freeze(value: Any) -> Hashable:
+    """Returns a hashable equivalent of value, with lists turned into tuples and dicts into sorted item tuples."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls with the same key into one in-flight call whose result all callers share.
+
+    Results are shared between the coalesced callers, so they must not be mutated.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.collapsed = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        register_singleflight(self)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Awaits the in-flight call for key, or starts call if there is none, and returns its result."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.collapsed += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # NOTE: shielded so a cancelled caller does not cancel the call of the others
+        return await asyncio.shield(future)
+
+    def forget(self, key: Hashable) -> None:
+        """Stops sharing the in-flight call for key, so calls made after a write start a new call instead of joining \
+        one that may return data read before the write. Callers already waiting keep awaiting it."""
+        self._in_flight.pop(key, None)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Marks the exception retrieved in case every caller was cancelled
+            future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "inFlight": len(self._in_flight),
+        }
+
+
+SINGLEFLIGHTS: Dict[str, SingleFlight] = {}
+
+
+def register_singleflight(flight: SingleFlight) -> None:
+    """Registers single flight group under its name for monitoring."""
+    if flight.name in SINGLEFLIGHTS:
+        raise ValueError(f"Single flight '{flight.name}' is already registered")
+    SINGLEFLIGHTS[flight.name] = flight
+
+
+def get_singleflight_stats() -> Dict[str, dict]:
+    """Returns counts of started and collapsed calls of every single flight group."""
+    return {name: flight.stats() for name, flight in SINGLEFLIGHTS.items()}
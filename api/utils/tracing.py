@@ -0,0 +1,172 @@
+"""Per-request traces of db calls and of time spent authenticating and serializing.
+
+`TracingMiddleware` starts a trace for every HTTP request in a context variable,
+`CouchbaseClient` adds each of its calls to the trace of the current request and
+`trace_phase` adds the time spent in a block. Requests over the latency or db call
+thresholds are logged with a summary of their db calls.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Tuple, Union
+
+
+def value_shape(value: Any) -> str:
+    """Returns the type of a parameter value and the length of sequences, leaving out the value."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def params_shape(params: Union[dict, None]) -> str:
+    """Returns the names and value shapes of query parameters."""
+    if not params:
+        return ""
+    return "{" + ", ".join(f"{k}:{value_shape(v)}" for k, v in params.items()) + "}"
+
+
+class DbCall(object):
+    """Db call made while handling a request"""
+
+    def __init__(
+        self,
+        operation: str,
+        name: str,
+        seconds: float,
+        params: str = "",
+        rows: Union[int, None] = None,
+    ):
+        self.operation = operation
+        self.name = name
+        self.seconds = seconds
+        self.params = params
+        self.rows = rows
+
+
+class RequestTrace(object):
+    """Db calls of a request and the time it spent in each phase"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.db_calls: List[DbCall] = []
+        self.phases: Dict[str, float] = {}
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_db_call(self, call: DbCall) -> None:
+        self.db_calls.append(call)
+        # Summed over concurrent calls, so it can exceed the time the request waited
+        self.add_phase("db", call.seconds)
+
+    def summary(self) -> str:
+        """Returns db calls grouped by operation, name and parameter shape, slowest first."""
+        groups: Dict[Tuple[str, str, str], list] = {}
+        for call in self.db_calls:
+            key = (call.operation, call.name, call.params)
+            group = groups.setdefault(key, [0, 0.0, 0])
+            group[0] += 1
+            group[1] += call.seconds
+            group[2] += call.rows or 0
+        lines = []
+        for (operation, name, params), (count, seconds, rows) in sorted(
+            groups.items(), key=lambda item: -item[1][1]
+        ):
+            line = f"{count}x {operation} {name}{params} {seconds * 1000:.1f}ms"
+            if operation == "query":
+                line += f" {rows} rows"
+            lines.append(line)
+        return "; ".join(lines)
+
+    def server_timing(self) -> str:
+        """Returns phase durations as a Server-Timing header value."""
+        metrics = [
+            f"{phase};dur={seconds * 1000:.1f}"
+            for phase, seconds in self.phases.items()
+        ]
+        total = time.perf_counter() - self.started_at
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+REQUEST_TRACE: ContextVar[Union[RequestTrace, None]] = ContextVar(
+    "request_trace", default=None
+)
+
+
+def trace_db_call(
+    operation: str,
+    name: str,
+    seconds: float,
+    params: Union[dict, None] = None,
+    rows: Union[int, None] = None,
+) -> None:
+    """Adds a db call on collection or query name to the trace of the current request, if any."""
+    trace = REQUEST_TRACE.get()
+    if trace is not None:
+        trace.add_db_call(DbCall(operation, name, seconds, params_shape(params), rows))
+
+
+@contextmanager
+def trace_phase(phase: str):
+    """Adds the time spent in the block to phase of the trace of the current request, if any."""
+    trace = REQUEST_TRACE.get()
+    if trace is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_phase(phase, time.perf_counter() - started_at)
+
+
+class TracingMiddleware(object):
+    """ASGI middleware tracing the db calls of HTTP requests, logging requests slower than slow_seconds or making \
+    more than db_call_budget db calls and adding a Server-Timing header if server_timing"""
+
+    def __init__(
+        self,
+        app,
+        slow_seconds: float,
+        db_call_budget: int,
+        server_timing: bool = False,
+    ):
+        self.app = app
+        self.slow_seconds = slow_seconds
+        self.db_call_budget = db_call_budget
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = REQUEST_TRACE.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUEST_TRACE.reset(token)
+            self.log_if_over_budget(scope, trace)
+
+    def log_if_over_budget(self, scope, trace: RequestTrace) -> None:
+        seconds = time.perf_counter() - trace.started_at
+        calls = len(trace.db_calls)
+        if seconds <= self.slow_seconds and calls <= self.db_call_budget:
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        logging.warning(
+            f"Slow request {scope['method']} {route}: {seconds * 1000:.1f}ms, "
+            f"{calls} db calls in {trace.phases.get('db', 0.0) * 1000:.1f}ms. "
+            f"{trace.summary()}"
+        )
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List, TypeVar, Union
+
+from ..core.exceptions import ServiceBusyException
+
+T = TypeVar("T")
+
+
+class BoundedExecutor(object):
+    """Runs blocking calls on a thread pool of limited size, rejecting calls once too many are waiting."""
+
+    def __init__(self, max_workers: int, max_queued: int, name: str):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.pending = 0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Runs func with args on the pool and returns its result, raising ServiceBusyException if the queue is full."""
+        if self.pending >= self.max_workers + self.max_queued:
+            raise ServiceBusyException()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Waits for running calls and shuts down the pool."""
+        self.executor.shutdown(wait=True)
+
+
+class JobQueue(object):
+    """Runs coroutine jobs in the background on a fixed number of worker tasks, rejecting jobs once too many are \
+    waiting."""
+
+    def __init__(self, workers: int, max_queued: int, name: str):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.name = name
+        # Created by start, queues bind to the event loop they are created on
+        self.queue: Union["asyncio.Queue[Callable[[], Awaitable]]", None] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Starts the worker tasks on the running event loop."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.max_queued)
+            self._tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    def full(self) -> bool:
+        """Returns whether enqueue would reject a job."""
+        return self.queue is None or self.queue.full()
+
+    def enqueue(self, job: Callable[[], Awaitable]) -> None:
+        """Queues job to run once a worker is free, raising ServiceBusyException if the queue is full or the workers \
+        are not started."""
+        if self.queue is None:
+            raise ServiceBusyException()
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ServiceBusyException()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await job()
+            except Exception:
+                logging.exception(f"Job of {self.name} failed")
+            finally:
+                self.queue.task_done()
+
+    async def stop(self) -> None:
+        """Cancels the worker tasks, dropping queued jobs."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.queue is not None and not self.queue.empty():
+            logging.warning(
+                f"Dropped {self.queue.qsize()} queued jobs of {self.name}"
+            )
+        self.queue = None